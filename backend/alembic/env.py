@@ -12,10 +12,13 @@ import sys
 # Add parent directory to path to import app modules
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
-# Check DATABASE_URL before importing database module (which would exit if missing)
-from app.config import settings
+# Settings raise a ValidationError when DATABASE_URL is missing; skip
+# migrations gracefully in that case instead of crashing the deploy
+from pydantic import ValidationError
 
-if not settings.DATABASE_URL:
+try:
+    from app.config import settings
+except ValidationError:
     print("WARNING: DATABASE_URL not set. Skipping database migrations.", file=sys.stderr)
     print("Please set DATABASE_URL in Railway environment variables.", file=sys.stderr)
     sys.exit(0)  # Exit gracefully, don't crash
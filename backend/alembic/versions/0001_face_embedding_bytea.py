@@ -0,0 +1,112 @@
+"""Store face embeddings as packed float32 bytes
+
+Converts face_embeddings.embedding from float8[] to BYTEA holding 128
+little-endian float32 values (512 bytes per row).
+
+Revision ID: 0001_face_embedding_bytea
+Revises:
+Create Date: 2026-10-16 00:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import numpy as np
+
+
+# revision identifiers, used by Alembic.
+revision = '0001_face_embedding_bytea'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+EMBEDDING_DTYPE = np.dtype("<f4")
+BATCH_SIZE = 1000
+
+
+def _embedding_column_type(bind):
+    """Return the current embedding column type, or None if the table doesn't exist yet."""
+    inspector = sa.inspect(bind)
+    if "face_embeddings" not in inspector.get_table_names():
+        return None
+    for column in inspector.get_columns("face_embeddings"):
+        if column["name"] == "embedding":
+            return column["type"]
+    return None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+
+    # Fresh databases get the new column type from create_all() at startup
+    column_type = _embedding_column_type(bind)
+    if column_type is None or not isinstance(column_type, sa.ARRAY):
+        return
+
+    op.add_column("face_embeddings", sa.Column("embedding_packed", sa.LargeBinary(), nullable=True))
+
+    # Pack in batches so large tables don't have to fit in memory
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.text(
+                "SELECT id, embedding FROM face_embeddings "
+                "WHERE id > :last_id ORDER BY id LIMIT :limit"
+            ),
+            {"last_id": last_id, "limit": BATCH_SIZE},
+        ).fetchall()
+        if not rows:
+            break
+
+        bind.execute(
+            sa.text("UPDATE face_embeddings SET embedding_packed = :packed WHERE id = :id"),
+            [
+                {"id": row[0], "packed": np.asarray(row[1], dtype=EMBEDDING_DTYPE).tobytes()}
+                for row in rows
+            ],
+        )
+        last_id = rows[-1][0]
+
+    op.drop_column("face_embeddings", "embedding")
+    op.alter_column(
+        "face_embeddings", "embedding_packed",
+        new_column_name="embedding", nullable=False
+    )
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+
+    column_type = _embedding_column_type(bind)
+    if column_type is None or not isinstance(column_type, sa.LargeBinary):
+        return
+
+    op.add_column("face_embeddings", sa.Column("embedding_array", sa.ARRAY(sa.Float()), nullable=True))
+
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.text(
+                "SELECT id, embedding FROM face_embeddings "
+                "WHERE id > :last_id ORDER BY id LIMIT :limit"
+            ),
+            {"last_id": last_id, "limit": BATCH_SIZE},
+        ).fetchall()
+        if not rows:
+            break
+
+        bind.execute(
+            sa.text("UPDATE face_embeddings SET embedding_array = :values WHERE id = :id").bindparams(
+                sa.bindparam("values", type_=sa.ARRAY(sa.Float()))
+            ),
+            [
+                {"id": row[0], "values": np.frombuffer(row[1], dtype=EMBEDDING_DTYPE).tolist()}
+                for row in rows
+            ],
+        )
+        last_id = rows[-1][0]
+
+    op.drop_column("face_embeddings", "embedding")
+    op.alter_column(
+        "face_embeddings", "embedding_array",
+        new_column_name="embedding", nullable=False
+    )
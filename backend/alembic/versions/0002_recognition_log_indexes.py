@@ -0,0 +1,78 @@
+"""Composite and BRIN indexes on recognition_logs
+
+Adds (created_at, id), (is_unknown, created_at DESC),
+(session_id, created_at DESC) and a BRIN index on created_at, and drops
+the single-column indexes they make redundant. (created_at, id) replaces
+the created_at index for keyset pagination on /api/logs/, so it is built
+before that index is dropped. Built CONCURRENTLY so the append-heavy
+table stays writable.
+
+Revision ID: 0002_recognition_log_indexes
+Revises: 0001_face_embedding_bytea
+Create Date: 2026-10-16 00:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0002_recognition_log_indexes'
+down_revision = '0001_face_embedding_bytea'
+branch_labels = None
+depends_on = None
+
+NEW_INDEXES = [
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_recognition_logs_created_at_id "
+    "ON recognition_logs (created_at, id)",
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_recognition_logs_unknown_created_at "
+    "ON recognition_logs (is_unknown, created_at DESC)",
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_recognition_logs_session_created_at "
+    "ON recognition_logs (session_id, created_at DESC)",
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_recognition_logs_created_at_brin "
+    "ON recognition_logs USING brin (created_at) WITH (pages_per_range = 32)",
+]
+
+REDUNDANT_INDEXES = {
+    "ix_recognition_logs_created_at": "created_at",
+    "ix_recognition_logs_is_unknown": "is_unknown",
+    "ix_recognition_logs_session_id": "session_id",
+}
+
+
+def _should_run(bind) -> bool:
+    """PostgreSQL only; fresh databases get the indexes from create_all() at startup."""
+    return (
+        bind.dialect.name == "postgresql"
+        and "recognition_logs" in sa.inspect(bind).get_table_names()
+    )
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    if not _should_run(bind):
+        return
+
+    # CONCURRENTLY can't run inside a transaction
+    with op.get_context().autocommit_block():
+        for statement in NEW_INDEXES:
+            op.execute(statement)
+        for name in REDUNDANT_INDEXES:
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    if not _should_run(bind):
+        return
+
+    with op.get_context().autocommit_block():
+        for name, column in REDUNDANT_INDEXES.items():
+            op.execute(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON recognition_logs ({column})")
+        for name in (
+            "ix_recognition_logs_created_at_id",
+            "ix_recognition_logs_unknown_created_at",
+            "ix_recognition_logs_session_created_at",
+            "ix_recognition_logs_created_at_brin",
+        ):
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
@@ -0,0 +1,74 @@
+"""Store recognition log face boxes as integer columns
+
+Replaces the "x,y,width,height" frame_position string with four
+SMALLINT columns, splitting existing values.
+
+Revision ID: 0003_recognition_log_frame_box
+Revises: 0002_recognition_log_indexes
+Create Date: 2026-10-16 00:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0003_recognition_log_frame_box'
+down_revision = '0002_recognition_log_indexes'
+branch_labels = None
+depends_on = None
+
+BOX_COLUMNS = ["frame_x", "frame_y", "frame_width", "frame_height"]
+
+
+def _columns(bind):
+    """Return the recognition_logs column names, or None if the table doesn't exist yet."""
+    inspector = sa.inspect(bind)
+    if "recognition_logs" not in inspector.get_table_names():
+        return None
+    return {column["name"] for column in inspector.get_columns("recognition_logs")}
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+
+    # Fresh databases get the new columns from create_all() at startup
+    columns = _columns(bind)
+    if columns is None or "frame_position" not in columns:
+        return
+
+    for name in BOX_COLUMNS:
+        op.add_column("recognition_logs", sa.Column(name, sa.SmallInteger(), nullable=True))
+
+    # Split well-formed "x,y,width,height" strings; anything else becomes NULL
+    op.execute(
+        """
+        UPDATE recognition_logs SET
+            frame_x = split_part(frame_position, ',', 1)::smallint,
+            frame_y = split_part(frame_position, ',', 2)::smallint,
+            frame_width = split_part(frame_position, ',', 3)::smallint,
+            frame_height = split_part(frame_position, ',', 4)::smallint
+        WHERE frame_position ~ '^-?[0-9]{1,5},-?[0-9]{1,5},-?[0-9]{1,5},-?[0-9]{1,5}$'
+        """
+    )
+
+    op.drop_column("recognition_logs", "frame_position")
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+
+    columns = _columns(bind)
+    if columns is None or "frame_position" in columns:
+        return
+
+    op.add_column("recognition_logs", sa.Column("frame_position", sa.String(100), nullable=True))
+    op.execute(
+        """
+        UPDATE recognition_logs
+        SET frame_position = concat_ws(',', frame_x, frame_y, frame_width, frame_height)
+        WHERE frame_x IS NOT NULL
+        """
+    )
+    for name in BOX_COLUMNS:
+        op.drop_column("recognition_logs", name)
@@ -0,0 +1,56 @@
+"""Composite (user_id, created_at DESC) index on recognition_logs
+
+Serves the per-user log filter (optionally with a date range) as an index
+range scan, and replaces the single-column user_id index (the composite's
+prefix still covers the ON DELETE SET NULL foreign-key lookups). Built
+CONCURRENTLY so the append-heavy table stays writable.
+
+Revision ID: 0004_recognition_log_user_index
+Revises: 0003_recognition_log_frame_box
+Create Date: 2026-10-16 00:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0004_recognition_log_user_index'
+down_revision = '0003_recognition_log_frame_box'
+branch_labels = None
+depends_on = None
+
+
+def _should_run(bind) -> bool:
+    """PostgreSQL only; fresh databases get the index from create_all() at startup."""
+    return (
+        bind.dialect.name == "postgresql"
+        and "recognition_logs" in sa.inspect(bind).get_table_names()
+    )
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    if not _should_run(bind):
+        return
+
+    # CONCURRENTLY can't run inside a transaction
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_recognition_logs_user_created_at "
+            "ON recognition_logs (user_id, created_at DESC)"
+        )
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_recognition_logs_user_id")
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    if not _should_run(bind):
+        return
+
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_recognition_logs_user_id "
+            "ON recognition_logs (user_id)"
+        )
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_recognition_logs_user_created_at")
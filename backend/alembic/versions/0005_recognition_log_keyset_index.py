@@ -0,0 +1,52 @@
+"""(created_at, id) index on recognition_logs for keyset pagination
+
+/api/logs/ pages with ORDER BY created_at DESC, id DESC and a
+(created_at, id) < (:created_at, :id) cursor; this index serves it as a
+backward range scan. The model declares it, but create_all() never adds
+indexes to an existing table. Built CONCURRENTLY so the append-heavy
+table stays writable.
+
+Revision ID: 0005_recognition_log_keyset_index
+Revises: 0004_recognition_log_user_index
+Create Date: 2026-10-16 00:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0005_recognition_log_keyset_index'
+down_revision = '0004_recognition_log_user_index'
+branch_labels = None
+depends_on = None
+
+
+def _should_run(bind) -> bool:
+    """PostgreSQL only; fresh databases get the index from create_all() at startup."""
+    return (
+        bind.dialect.name == "postgresql"
+        and "recognition_logs" in sa.inspect(bind).get_table_names()
+    )
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    if not _should_run(bind):
+        return
+
+    # CONCURRENTLY can't run inside a transaction
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_recognition_logs_created_at_id "
+            "ON recognition_logs (created_at, id)"
+        )
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    if not _should_run(bind):
+        return
+
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_recognition_logs_created_at_id")
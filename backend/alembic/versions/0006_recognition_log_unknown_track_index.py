@@ -0,0 +1,51 @@
+"""Partial track_id index on unknown recognition_logs rows
+
+Serves /api/search/unknown-group (GROUP BY track_id over is_unknown rows)
+without touching identified rows. The model declares it, but create_all()
+never adds indexes to an existing table. Built CONCURRENTLY so the
+append-heavy table stays writable.
+
+Revision ID: 0006_recognition_log_unknown_track_index
+Revises: 0005_recognition_log_keyset_index
+Create Date: 2026-10-16 00:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0006_recognition_log_unknown_track_index'
+down_revision = '0005_recognition_log_keyset_index'
+branch_labels = None
+depends_on = None
+
+
+def _should_run(bind) -> bool:
+    """PostgreSQL only; fresh databases get the index from create_all() at startup."""
+    return (
+        bind.dialect.name == "postgresql"
+        and "recognition_logs" in sa.inspect(bind).get_table_names()
+    )
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    if not _should_run(bind):
+        return
+
+    # CONCURRENTLY can't run inside a transaction
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_recognition_logs_unknown_track_id "
+            "ON recognition_logs (track_id) WHERE is_unknown IS true"
+        )
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    if not _should_run(bind):
+        return
+
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_recognition_logs_unknown_track_id")
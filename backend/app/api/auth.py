@@ -2,15 +2,18 @@
 Authentication API endpoints.
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Request, Response, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
 from typing import Optional
-from datetime import timedelta
+from cachetools import TLRUCache, TTLCache
+import math
+import threading
+import time
 import logging
 
 from app.database import get_db
-from app.services.auth_service import AuthService
+from app.services.auth_service import AuthService, AuthUserSnapshot
 from app.models.auth import AuthUser, UserRole
 from app.config import settings
 from pydantic import BaseModel
@@ -21,6 +24,8 @@ router = APIRouter(prefix="/api/auth", tags=["authentication"])
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
 auth_service = AuthService()
+# Shared (Redis) token and user revocation markers; disabled without Redis
+cache_service = auth_service.cache_service
 
 
 class Token(BaseModel):
@@ -38,14 +43,92 @@ class UserInfo(BaseModel):
     is_active: bool
 
 
+def _jwt_ttu(token: str, payload: dict, now: float) -> float:
+    """Expire cached payloads at the token's own `exp`, capped by the token lifetime."""
+    max_ttl = settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
+    exp = payload.get("exp")
+    if exp is None:
+        return now + max_ttl
+    return now + min(max_ttl, float(exp) - time.time())
+
+
+# Decoded JWT payloads keyed by raw token (valid tokens only)
+_jwt_cache = TLRUCache(maxsize=10_000, ttu=_jwt_ttu, timer=time.monotonic)
+_jwt_cache_lock = threading.Lock()
+
+
+def _decode_cached(token: str) -> Optional[dict]:
+    """
+    Decode a JWT, reusing the payload of a previously verified token.
+    Invalid or expired tokens are never cached.
+    """
+    with _jwt_cache_lock:
+        payload = _jwt_cache.get(token)
+    if payload is not None:
+        return payload
+    
+    payload = auth_service.decode_access_token(token)
+    if payload is not None:
+        with _jwt_cache_lock:
+            _jwt_cache[token] = payload
+    return payload
+
+
+# Short-lived cache of user lookups done while validating tokens
+_user_cache = TTLCache(maxsize=5_000, ttl=30)
+_user_cache_lock = threading.Lock()
+
+
+def _get_user_cached(db: Session, username: str) -> Optional[AuthUserSnapshot]:
+    """Get a user snapshot by username, hitting the database at most once per TTL."""
+    with _user_cache_lock:
+        cached = _user_cache.get(username)
+    if cached is not None:
+        return cached
+    
+    user = auth_service.get_user_by_username(db, username)
+    if user is None:
+        return None
+    
+    snapshot = AuthUserSnapshot.from_user(user)
+    with _user_cache_lock:
+        _user_cache[username] = snapshot
+    return snapshot
+
+
+def invalidate_user_cache(username: str) -> None:
+    """Drop a cached user snapshot (call after any change to the user)."""
+    with _user_cache_lock:
+        _user_cache.pop(username, None)
+
+
+def _snapshot_from_claims(payload: dict) -> Optional[AuthUserSnapshot]:
+    """
+    Build a user snapshot from token claims alone.
+    Returns None for tokens without the needed claims (issued by older versions).
+    """
+    try:
+        return AuthUserSnapshot(
+            id=int(payload["uid"]),
+            username=payload["sub"],
+            email=None,
+            role=UserRole(payload["role"]),
+            is_active=True
+        )
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
 def get_current_user(
     token: str = Depends(oauth2_scheme),
     db: Session = Depends(get_db)
-) -> AuthUser:
+) -> AuthUserSnapshot:
     """
     Dependency to get current authenticated user from JWT token.
+    Returns a detached snapshot; do not use it for ORM updates. When built
+    from token claims the snapshot has no email (see /me).
     """
-    payload = auth_service.decode_access_token(token)
+    payload = _decode_cached(token)
     
     if payload is None:
         raise HTTPException(
@@ -62,7 +145,26 @@ def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    user = auth_service.get_user_by_username(db, username)
+    # Fast path: with a shared revocation list, a valid token that isn't
+    # revoked is trusted as-is (no database lookup), unless its user was
+    # deactivated or had their role changed since (see AuthService.update_user)
+    snapshot = _snapshot_from_claims(payload)
+    if snapshot is not None and payload.get("jti"):
+        revocation = cache_service.get_token_revocation(payload["jti"], snapshot.id)
+        if revocation is not None:
+            token_revoked, user_changed = revocation
+            if token_revoked:
+                raise HTTPException(
+                    status_code=status.HTTP_401_UNAUTHORIZED,
+                    detail="Token has been revoked",
+                    headers={"WWW-Authenticate": "Bearer"},
+                )
+            if not user_changed:
+                return snapshot
+    
+    # Revocation list unavailable or user changed: confirm the user is still
+    # active, and take the role from the database rather than the token
+    user = _get_user_cached(db, username)
     if user is None or not user.is_active:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -77,7 +179,7 @@ def require_role(required_role: UserRole):
     """
     Dependency factory to require specific role.
     """
-    def role_checker(current_user: AuthUser = Depends(get_current_user)) -> AuthUser:
+    def role_checker(current_user: AuthUserSnapshot = Depends(get_current_user)) -> AuthUserSnapshot:
         if not auth_service.has_permission(current_user, required_role):
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
@@ -88,10 +190,47 @@ def require_role(required_role: UserRole):
     return role_checker
 
 
+# Login attempts per client IP: ip -> (window_start, count)
+_login_attempts = TTLCache(maxsize=10_000, ttl=settings.LOGIN_RATE_LIMIT_WINDOW)
+_login_attempts_lock = threading.Lock()
+
+
+def check_login_rate_limit(request: Request) -> None:
+    """
+    Dependency limiting login attempts per client IP (fixed window).
+    Keeps the password KDF from being usable as a CPU exhaustion vector.
+    Behind a reverse proxy the client IP comes from X-Forwarded-For, which
+    uvicorn only honours for FORWARDED_ALLOW_IPS (see start.sh); otherwise
+    every caller would share the proxy's bucket.
+    """
+    client_ip = request.client.host if request.client else "unknown"
+    window = settings.LOGIN_RATE_LIMIT_WINDOW
+    now = time.monotonic()
+    
+    with _login_attempts_lock:
+        window_start, count = _login_attempts.get(client_ip, (now, 0))
+        if now - window_start >= window:
+            window_start, count = now, 0
+        count += 1
+        _login_attempts[client_ip] = (window_start, count)
+    
+    if count > settings.LOGIN_RATE_LIMIT:
+        retry_after = max(1, math.ceil(window - (now - window_start)))
+        logger.warning(f"Login rate limit exceeded for {client_ip}")
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many login attempts, please try again later",
+            headers={"Retry-After": str(retry_after)},
+        )
+
+
+# Login/register hit the DB and the password KDF, so they are sync and run in the threadpool
 @router.post("/login", response_model=Token)
-async def login(
+def login(
+    background_tasks: BackgroundTasks,
     form_data: OAuth2PasswordRequestForm = Depends(),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    _: None = Depends(check_login_rate_limit)
 ):
     """
     Login endpoint - returns JWT token.
@@ -103,39 +242,10 @@ async def login(
         # Log login attempt (without password)
         logger.info(f"Login attempt for username: '{form_data.username}'")
         
-        # Try to find user (case-insensitive username lookup)
-        user = db.query(AuthUser).filter(
-            AuthUser.username.ilike(form_data.username.strip())
-        ).first()
-        
+        # Lookup, active check, password check and hash upgrade; also queues
+        # the last_login update
+        user = auth_service.authenticate_user(db, form_data.username, form_data.password)
         if not user:
-            logger.warning(f"User not found: '{form_data.username}'")
-            # Log all existing usernames for debugging
-            all_users = db.query(AuthUser).all()
-            if all_users:
-                usernames = [u.username for u in all_users]
-                logger.info(f"Existing usernames in database: {usernames}")
-            else:
-                logger.warning("No users found in database!")
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Incorrect username or password",
-                headers={"WWW-Authenticate": "Bearer"},
-            )
-        
-        # Check if user is active
-        if not user.is_active:
-            logger.warning(f"User '{user.username}' is not active")
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Incorrect username or password",
-                headers={"WWW-Authenticate": "Bearer"},
-            )
-        
-        # Verify password
-        logger.debug(f"Verifying password for user: '{user.username}'")
-        if not auth_service.verify_password(form_data.password, user.hashed_password):
-            logger.warning(f"Password verification failed for user: '{user.username}'")
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Incorrect username or password",
@@ -144,10 +254,12 @@ async def login(
         
         logger.info(f"Login successful for user: '{user.username}' (role: {user.role.value})")
         
-        access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+        # Write the queued last_login after the response is sent (batched with other logins)
+        background_tasks.add_task(auth_service.flush_last_logins)
+        
+        # Default lifetime (ACCESS_TOKEN_EXPIRE_MINUTES) is precomputed in AuthService
         access_token = auth_service.create_access_token(
-            data={"sub": user.username, "role": user.role.value},
-            expires_delta=access_token_expires
+            data={"sub": user.username, "role": user.role.value, "uid": user.id}
         )
         
         return {"access_token": access_token, "token_type": "bearer"}
@@ -165,26 +277,54 @@ async def login(
 
 
 @router.get("/me", response_model=UserInfo)
-async def get_current_user_info(current_user: AuthUser = Depends(get_current_user)):
+def get_current_user_info(
+    current_user: AuthUserSnapshot = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
     """Get current user information."""
+    # Token-claim snapshots carry no email, so load the full (cached) record
+    user = _get_user_cached(db, current_user.username) or current_user
     return UserInfo(
-        id=current_user.id,
-        username=current_user.username,
-        email=current_user.email,
-        role=current_user.role.value,
-        is_active=current_user.is_active
+        id=user.id,
+        username=user.username,
+        email=user.email,
+        role=user.role.value,
+        is_active=user.is_active
     )
 
 
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+def logout(
+    token: str = Depends(oauth2_scheme),
+    current_user: AuthUserSnapshot = Depends(get_current_user)
+):
+    """
+    Revoke the current access token.
+    Requires Redis; without it tokens stay valid until they expire.
+    """
+    payload = _decode_cached(token) or {}
+    jti = payload.get("jti")
+    exp = payload.get("exp")
+    
+    if jti and exp:
+        if not cache_service.revoke_token(jti, ttl=float(exp) - time.time()):
+            logger.info(f"Token revocation unavailable; token for '{current_user.username}' expires normally")
+    
+    with _jwt_cache_lock:
+        _jwt_cache.pop(token, None)
+    
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+
 @router.post("/register", response_model=UserInfo, status_code=status.HTTP_201_CREATED)
-async def register_user(
+def register_user(
     username: str,
     password: str,
     email: Optional[str] = None,
     role: UserRole = UserRole.OPERATOR,
     db: Session = Depends(get_db),
     # Require admin to create users
-    admin_user: AuthUser = Depends(require_role(UserRole.ADMIN))
+    admin_user: AuthUserSnapshot = Depends(require_role(UserRole.ADMIN))
 ):
     """
     Register a new authentication user.
@@ -199,6 +339,7 @@ async def register_user(
         )
     
     user = auth_service.create_user(db, username, password, email, role)
+    invalidate_user_cache(user.username)
     
     return UserInfo(
         id=user.id,
@@ -208,3 +349,34 @@ async def register_user(
         is_active=user.is_active
     )
 
+
+@router.patch("/users/{user_id}", response_model=UserInfo)
+def update_user(
+    user_id: int,
+    role: Optional[UserRole] = None,
+    is_active: Optional[bool] = None,
+    db: Session = Depends(get_db),
+    admin_user: AuthUserSnapshot = Depends(require_role(UserRole.ADMIN))
+):
+    """
+    Change a user's role or deactivate/reactivate them.
+    Requires ADMIN role. The user's existing tokens stop carrying the old
+    role/active state immediately.
+    """
+    user = db.get(AuthUser, user_id)
+    if user is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+    
+    user = auth_service.update_user(db, user, role=role, is_active=is_active)
+    invalidate_user_cache(user.username)
+    
+    return UserInfo(
+        id=user.id,
+        username=user.username,
+        email=user.email,
+        role=user.role.value,
+        is_active=user.is_active
+    )
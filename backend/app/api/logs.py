@@ -2,26 +2,83 @@
 REST API endpoints for recognition logs.
 """
 
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_
-from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import and_, or_, tuple_, func, text
+from typing import List, Optional, Tuple
 from datetime import datetime
+import base64
+import json
 import logging
 
 from app.database import get_db
-from app.schemas.recognition_log import RecognitionLogResponse, RecognitionLogFilter
+from app.schemas.recognition_log import RecognitionLogResponse, RecognitionLogPage, RecognitionLogFilter
 from app.models import RecognitionLog, User
-from app.api.auth import get_current_user
-from app.models.auth import AuthUser
+from app.services.cache_service import CacheService
+from app.services.session_summary import SESSIONS_VIEW, is_sessions_view_available
+from app.api.auth import AuthUserSnapshot, get_current_user
+from app.utils.responses import FastJSONResponse
+
+# Optional orjson import (fast NDJSON rendering)
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    orjson = None
+    ORJSON_AVAILABLE = False
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/logs", tags=["logs"])
 
+cache_service = CacheService()
+
+# Seconds to reuse a computed stats payload
+STATS_CACHE_TTL = 60
+
+# Deep OFFSET pages make the database scan and discard every skipped row
+MAX_LOGS_OFFSET = 100_000
+OFFSET_WARNING_THRESHOLD = 10_000
+
+# Upper bound for a single logs query (PostgreSQL only)
+LOGS_STATEMENT_TIMEOUT = "2s"
+
+# Handlers below are sync `def` on purpose: they use the blocking SQLAlchemy
+# session, so FastAPI runs them in its threadpool instead of the event loop.
+
+
+def _encode_cursor(log: RecognitionLog) -> str:
+    """Encode the (created_at, id) position of a log row as an opaque cursor."""
+    raw = f"{log.created_at.isoformat()}|{log.id}"
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+def _ndjson_lines(logs: List[RecognitionLog]):
+    """Render log rows as newline-delimited JSON, one row at a time."""
+    for log in logs:
+        if ORJSON_AVAILABLE:
+            yield orjson.dumps(log.to_dict(), option=orjson.OPT_APPEND_NEWLINE)
+        else:
+            yield (json.dumps(log.to_dict()) + "\n").encode("utf-8")
 
-@router.get("/", response_model=List[RecognitionLogResponse])
-async def get_recognition_logs(
+
+def _decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Decode a cursor produced by _encode_cursor."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8")
+        created_at, log_id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(created_at), int(log_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+@router.get("/", response_model=RecognitionLogPage)
+def get_recognition_logs(
+    request: Request,
     user_id: Optional[int] = Query(None, description="Filter by user ID"),
     session_id: Optional[str] = Query(None, description="Filter by session ID"),
     is_unknown: Optional[bool] = Query(None, description="Filter by unknown status"),
@@ -29,9 +86,10 @@ async def get_recognition_logs(
     end_date: Optional[datetime] = Query(None, description="End date filter"),
     min_confidence: Optional[float] = Query(None, ge=0.0, le=1.0, description="Minimum confidence"),
     limit: int = Query(100, ge=1, le=1000, description="Maximum number of results"),
-    offset: int = Query(0, ge=0, description="Offset for pagination"),
+    cursor: Optional[str] = Query(None, description="Cursor from a previous page's next_cursor"),
+    offset: int = Query(0, ge=0, deprecated=True, description=f"Offset for pagination, max {MAX_LOGS_OFFSET} (use cursor for deeper paging)"),
     db: Session = Depends(get_db),
-    current_user: AuthUser = Depends(get_current_user)
+    current_user: AuthUserSnapshot = Depends(get_current_user)
 ):
     """
     Get recognition logs with optional filters.
@@ -43,10 +101,30 @@ async def get_recognition_logs(
     - start_date/end_date: Time range
     - min_confidence: Minimum confidence score
     
-    Results are ordered by created_at (newest first).
+    Results are ordered by created_at (newest first). Pass the returned
+    next_cursor back as `cursor` to fetch the following page.
+    
+    Send `Accept: application/x-ndjson` to stream one JSON object per line
+    instead; the next cursor is then returned in the X-Next-Cursor header.
     """
+    if offset > MAX_LOGS_OFFSET:
+        raise HTTPException(
+            status_code=400,
+            detail=f"offset cannot exceed {MAX_LOGS_OFFSET}; page with the cursor parameter instead"
+        )
+    if offset > OFFSET_WARNING_THRESHOLD:
+        logger.warning(f"Deep offset pagination on /api/logs/ (offset={offset}); client should migrate to cursor")
+    
     try:
-        query = db.query(RecognitionLog)
+        # Bound the query so a deep page can't hold a pooled connection indefinitely
+        if db.bind is not None and db.bind.dialect.name == "postgresql":
+            db.execute(text(f"SET LOCAL statement_timeout = '{LOGS_STATEMENT_TIMEOUT}'"))
+        
+        # Load the recognized user's name in the same query (needed for user_name);
+        # only the columns to_dict()/the response read, not the whole User row
+        query = db.query(RecognitionLog).options(
+            joinedload(RecognitionLog.user).load_only(User.id, User.name)
+        )
         
         # Apply filters
         if user_id is not None:
@@ -67,18 +145,36 @@ async def get_recognition_logs(
         if min_confidence is not None:
             query = query.filter(RecognitionLog.confidence >= min_confidence)
         
-        # Order by created_at (newest first) and apply pagination
-        query = query.order_by(RecognitionLog.created_at.desc())
-        logs = query.offset(offset).limit(limit).all()
+        # Keyset pagination: seek past the last row of the previous page
+        if cursor is not None:
+            cursor_ts, cursor_id = _decode_cursor(cursor)
+            query = query.filter(
+                tuple_(RecognitionLog.created_at, RecognitionLog.id) < tuple_(cursor_ts, cursor_id)
+            )
+        
+        # Order by created_at (newest first), id as tie-breaker
+        query = query.order_by(RecognitionLog.created_at.desc(), RecognitionLog.id.desc())
+        if cursor is None and offset:
+            query = query.offset(offset)
+        logs = query.limit(limit).all()
         
-        # Convert to response format
-        result = []
-        for log in logs:
-            log_dict = log.to_dict()
-            result.append(RecognitionLogResponse(**log_dict))
+        next_cursor = _encode_cursor(logs[-1]) if len(logs) == limit else None
         
-        return result
+        # NDJSON: stream rows straight from the ORM objects, skipping response validation
+        if NDJSON_MEDIA_TYPE in request.headers.get("accept", ""):
+            headers = {"X-Next-Cursor": next_cursor} if next_cursor else None
+            return StreamingResponse(_ndjson_lines(logs), media_type=NDJSON_MEDIA_TYPE, headers=headers)
         
+        # Rows come from our own database: to_dict() already matches
+        # RecognitionLogResponse, so encode them directly instead of
+        # validating every row (and again through response_model)
+        return FastJSONResponse({
+            "items": [log.to_dict() for log in logs],
+            "next_cursor": next_cursor,
+        })
+        
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error getting recognition logs: {e}")
         raise HTTPException(
@@ -88,11 +184,11 @@ async def get_recognition_logs(
 
 
 @router.get("/stats", response_model=dict)
-async def get_recognition_stats(
+def get_recognition_stats(
     start_date: Optional[datetime] = Query(None, description="Start date"),
     end_date: Optional[datetime] = Query(None, description="End date"),
     db: Session = Depends(get_db),
-    current_user: AuthUser = Depends(get_current_user)
+    current_user: AuthUserSnapshot = Depends(get_current_user)
 ):
     """
     Get recognition statistics.
@@ -105,25 +201,34 @@ async def get_recognition_stats(
     - top_users: Top 10 most recognized users
     """
     try:
-        query = db.query(RecognitionLog)
+        period = {
+            "start_date": start_date.isoformat() if start_date else None,
+            "end_date": end_date.isoformat() if end_date else None,
+        }
+        cache_key = f"logs_stats:{period['start_date']}:{period['end_date']}"
+        cached_stats = cache_service.get_json(cache_key)
+        if cached_stats is not None:
+            return cached_stats
         
+        filters = []
         if start_date:
-            query = query.filter(RecognitionLog.created_at >= start_date)
+            filters.append(RecognitionLog.created_at >= start_date)
         if end_date:
-            query = query.filter(RecognitionLog.created_at <= end_date)
-        
-        # Total recognitions
-        total = query.count()
-        
-        # Unique users
-        unique_users = query.filter(RecognitionLog.user_id.isnot(None)).distinct(RecognitionLog.user_id).count()
+            filters.append(RecognitionLog.created_at <= end_date)
         
-        # Unknown count
-        unknown_count = query.filter(RecognitionLog.is_unknown == True).count()
-        
-        # Average confidence
-        from sqlalchemy import func
-        avg_confidence = query.with_entities(func.avg(RecognitionLog.confidence)).scalar() or 0.0
+        # Total, unique users, unknown count and average confidence in one scan
+        # (the distinct count and average need the scan anyway, so the exact
+        # total costs nothing extra)
+        total, unique_users, unknown_count, avg_confidence = (
+            db.query(
+                func.count(RecognitionLog.id),
+                func.count(func.distinct(RecognitionLog.user_id)),
+                func.count(RecognitionLog.id).filter(RecognitionLog.is_unknown == True),
+                func.avg(RecognitionLog.confidence),
+            )
+            .filter(*filters)
+            .one()
+        )
         
         # Top users
         top_users_query = (
@@ -135,13 +240,9 @@ async def get_recognition_stats(
             .join(RecognitionLog, User.id == RecognitionLog.user_id)
         )
         
-        if start_date:
-            top_users_query = top_users_query.filter(RecognitionLog.created_at >= start_date)
-        if end_date:
-            top_users_query = top_users_query.filter(RecognitionLog.created_at <= end_date)
-        
         top_users_list = (
             top_users_query
+            .filter(*filters)
             .group_by(User.id, User.name)
             .order_by(func.count(RecognitionLog.id).desc())
             .limit(10)
@@ -153,17 +254,17 @@ async def get_recognition_stats(
             for user_id, name, count in top_users_list
         ]
         
-        return {
+        stats = {
             "total_recognitions": total,
             "unique_users": unique_users,
             "unknown_count": unknown_count,
-            "average_confidence": round(float(avg_confidence), 4),
+            "average_confidence": round(float(avg_confidence or 0.0), 4),
             "top_users": top_users,
-            "period": {
-                "start_date": start_date.isoformat() if start_date else None,
-                "end_date": end_date.isoformat() if end_date else None,
-            }
+            "period": period,
         }
+        cache_service.cache_json(cache_key, stats, ttl=STATS_CACHE_TTL)
+        
+        return stats
         
     except Exception as e:
         logger.error(f"Error getting stats: {e}")
@@ -174,10 +275,10 @@ async def get_recognition_stats(
 
 
 @router.get("/sessions", response_model=List[dict])
-async def get_sessions(
+def get_sessions(
     limit: int = Query(50, ge=1, le=200),
     db: Session = Depends(get_db),
-    current_user: AuthUser = Depends(get_current_user)
+    current_user: AuthUserSnapshot = Depends(get_current_user)
 ):
     """
     Get list of recognition sessions.
@@ -189,24 +290,34 @@ async def get_sessions(
     - duration_seconds
     - total_recognitions
     - unique_users
+    
+    On PostgreSQL this reads a materialized view refreshed every minute,
+    so the most recent session may lag by up to that long.
     """
     try:
-        from sqlalchemy import func
-        
-        sessions = (
-            db.query(
-                RecognitionLog.session_id,
-                func.min(RecognitionLog.created_at).label('start_time'),
-                func.max(RecognitionLog.created_at).label('end_time'),
-                func.count(RecognitionLog.id).label('total_recognitions'),
-                func.count(func.distinct(RecognitionLog.user_id)).label('unique_users')
+        if is_sessions_view_available():
+            sessions = db.execute(
+                text(
+                    f"SELECT session_id, start_time, end_time, total_recognitions, unique_users "
+                    f"FROM {SESSIONS_VIEW} ORDER BY start_time DESC LIMIT :limit"
+                ),
+                {"limit": limit}
+            ).all()
+        else:
+            sessions = (
+                db.query(
+                    RecognitionLog.session_id,
+                    func.min(RecognitionLog.created_at).label('start_time'),
+                    func.max(RecognitionLog.created_at).label('end_time'),
+                    func.count(RecognitionLog.id).label('total_recognitions'),
+                    func.count(func.distinct(RecognitionLog.user_id)).label('unique_users')
+                )
+                .filter(RecognitionLog.session_id.isnot(None))
+                .group_by(RecognitionLog.session_id)
+                .order_by(func.min(RecognitionLog.created_at).desc())
+                .limit(limit)
+                .all()
             )
-            .filter(RecognitionLog.session_id.isnot(None))
-            .group_by(RecognitionLog.session_id)
-            .order_by(func.min(RecognitionLog.created_at).desc())
-            .limit(limit)
-            .all()
-        )
         
         result = []
         for session in sessions:
@@ -5,10 +5,12 @@ API endpoints for face similarity search and advanced features.
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from typing import List, Optional
+import asyncio
 import logging
 import numpy as np
 
 from app.database import get_db
+from app.utils.concurrency import run_cpu
 # Optional face recognition import
 try:
     from app.services.face_recognition import FaceRecognitionService
@@ -31,9 +33,13 @@ else:
     face_recognition_service = None
 user_service = UserService()
 
+# Sync handlers: DB queries and face encoding block, so these run in the threadpool.
+# /compare touches no database and is async: it sends its two independent
+# images to the CPU pool (run_cpu) itself.
+
 
 @router.get("/similar", response_model=List[dict])
-async def find_similar_faces(
+def find_similar_faces(
     image_data: str = Query(..., description="Base64 encoded image"),
     threshold: float = Query(0.6, ge=0.0, le=1.0, description="Similarity threshold"),
     limit: int = Query(10, ge=1, le=50, description="Maximum results"),
@@ -85,7 +91,7 @@ async def find_similar_faces(
 
 
 @router.get("/unknown-group", response_model=List[dict])
-async def group_unknown_faces(
+def group_unknown_faces(
     session_id: Optional[str] = Query(None, description="Filter by session ID"),
     threshold: float = Query(0.7, ge=0.0, le=1.0, description="Grouping similarity threshold"),
     db: Session = Depends(get_db)
@@ -98,47 +104,52 @@ async def group_unknown_faces(
     """
     try:
         from app.models import RecognitionLog
-        from collections import defaultdict
-        
-        # Get all unknown recognition logs
-        query = db.query(RecognitionLog).filter(RecognitionLog.is_unknown == True)
-        if session_id:
-            query = query.filter(RecognitionLog.session_id == session_id)
-        
-        unknown_logs = query.all()
-        
-        if not unknown_logs:
-            return []
+        from sqlalchemy import func
+        from sqlalchemy.dialects.postgresql import aggregate_order_by
         
         # Note: This is a simplified version. In a full implementation,
         # you would store embeddings for unknown faces and compare them.
-        # For now, we'll group by track_id and frame_position similarity
+        # For now, we group by track_id (same track = same person)
+        
+        # Group in SQL so only multi-occurrence tracks come over the wire
+        occurrence = func.json_build_object(
+            "log_id", RecognitionLog.id,
+            "track_id", RecognitionLog.track_id,
+            "frame_position", RecognitionLog.frame_position,
+            "created_at", RecognitionLog.created_at,
+            "session_id", RecognitionLog.session_id
+        )
+        query = db.query(
+            RecognitionLog.track_id,
+            func.count(RecognitionLog.id),
+            func.min(RecognitionLog.created_at),
+            func.max(RecognitionLog.created_at),
+            func.array_agg(aggregate_order_by(occurrence, RecognitionLog.created_at))
+        ).filter(
+            RecognitionLog.is_unknown == True,
+            RecognitionLog.track_id.isnot(None),
+            RecognitionLog.track_id != ""
+        )
+        if session_id:
+            query = query.filter(RecognitionLog.session_id == session_id)
         
-        # Group by track_id (same track = same person)
-        groups = defaultdict(list)
-        for log in unknown_logs:
-            if log.track_id:
-                groups[log.track_id].append({
-                    "log_id": log.id,
-                    "track_id": log.track_id,
-                    "frame_position": log.frame_position,
-                    "created_at": log.created_at.isoformat() if log.created_at else None,
-                    "session_id": log.session_id
-                })
+        groups = (
+            query.group_by(RecognitionLog.track_id)
+            .having(func.count(RecognitionLog.id) > 1)
+            .all()
+        )
         
         # Format results
-        result = []
-        for track_id, logs in groups.items():
-            if len(logs) > 1:  # Only groups with multiple occurrences
-                result.append({
-                    "group_id": track_id,
-                    "occurrence_count": len(logs),
-                    "first_seen": min(log["created_at"] for log in logs if log["created_at"]),
-                    "last_seen": max(log["created_at"] for log in logs if log["created_at"]),
-                    "occurrences": logs
-                })
-        
-        return result
+        return [
+            {
+                "group_id": track_id,
+                "occurrence_count": count,
+                "first_seen": first_seen.isoformat() if first_seen else None,
+                "last_seen": last_seen.isoformat() if last_seen else None,
+                "occurrences": occurrences
+            }
+            for track_id, count, first_seen, last_seen, occurrences in groups
+        ]
         
     except Exception as e:
         logger.error(f"Error grouping unknown faces: {e}")
@@ -151,8 +162,7 @@ async def group_unknown_faces(
 @router.post("/compare", response_model=dict)
 async def compare_two_faces(
     image1_data: str = Query(..., description="Base64 encoded first image"),
-    image2_data: str = Query(..., description="Base64 encoded second image"),
-    db: Session = Depends(get_db)
+    image2_data: str = Query(..., description="Base64 encoded second image")
 ):
     """
     Compare two face images and return similarity score.
@@ -160,13 +170,16 @@ async def compare_two_faces(
     Useful for verifying if two images show the same person.
     """
     try:
-        # Decode both images
-        image1 = decode_base64_image(image1_data)
-        image2 = decode_base64_image(image2_data)
-        
-        # Extract embeddings
-        embedding1 = face_recognition_service.extract_embedding(image1)
-        embedding2 = face_recognition_service.extract_embedding(image2)
+        # The two images are independent: decode and embed them concurrently
+        # in the CPU pool (OpenCV and dlib release the GIL while working)
+        async def decode_and_embed(image_data: str) -> Optional[np.ndarray]:
+            image = await run_cpu(decode_base64_image, image_data)
+            return await run_cpu(face_recognition_service.extract_embedding, image)
+        
+        embedding1, embedding2 = await asyncio.gather(
+            decode_and_embed(image1_data),
+            decode_and_embed(image2_data)
+        )
         
         if embedding1 is None:
             raise HTTPException(status_code=400, detail="No face detected in first image")
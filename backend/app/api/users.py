@@ -2,34 +2,43 @@
 REST API endpoints for user management.
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
+from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from starlette.concurrency import run_in_threadpool
+from typing import BinaryIO, List, Optional, Union
+from cachetools import LRUCache
+import asyncio
+import hashlib
 import logging
+import os
+import threading
 
 from app.database import get_db
 from app.schemas.user import UserCreate, UserResponse, UserUpdate, UserRegisterRequest, MultiAngleRegistrationRequest, VideoRegistrationRequest
 from app.schemas.face_embedding import FaceEmbeddingResponse, AddFaceRequest
 from app.services.user_service import UserService
+from app.services.embedding_index import invalidate_embedding_index
 from app.config import settings
 from app.utils.errors import (
     handle_exception, ValidationError, NotFoundError, FaceDetectionError,
     AuthenticationError, AuthorizationError,
     validate_face_image, validate_user_data
 )
-from app.api.auth import get_current_user, require_role
-from app.models.auth import AuthUser, UserRole
+from app.api.auth import AuthUserSnapshot, get_current_user, require_role
+from app.models.auth import UserRole
+from app.utils.concurrency import run_cpu
+from app.utils.responses import FastJSONResponse
 
 # Optional face recognition imports
 try:
     from app.services.face_detection import FaceDetectionService
     from app.services.face_recognition import FaceRecognitionService
     from app.utils.image_processing import (
-        decode_base64_image, calculate_image_quality, check_face_size,
+        decode_base64_image, decode_image_bytes, calculate_image_quality, check_face_size,
         calculate_face_position_status, enhance_image_for_detection, resize_image
     )
     from app.utils.video_processing import (
-        decode_base64_video, extract_frames_from_video, 
+        decode_base64_video_to_file, save_video_to_file, extract_frames_and_detect_faces,
         validate_video_for_face_detection, get_best_frames_from_video
     )
     FACE_RECOGNITION_AVAILABLE = True
@@ -50,12 +59,76 @@ else:
     face_detection_service = None
     face_recognition_service = None
 
+# Image/video decoding, detection and embedding are CPU-bound: async handlers
+# await them via run_cpu so the event loop stays free. Handlers that only
+# touch the database are sync and run in FastAPI's threadpool; async handlers
+# send their (blocking) database calls there with run_in_threadpool.
+
+# Bump when decoding/detection/embedding preprocessing changes so features
+# cached by the old pipeline are never reused
+FACE_FEATURES_PREPROCESS_VERSION = "1"
+
+# Extracted face features keyed by image content + model + preprocess version
+# (retried or duplicate uploads of the same image skip detect/embed entirely)
+_face_features_cache = LRUCache(maxsize=1024)
+_face_features_lock = threading.Lock()
+
+
+def _decode_image(image_data: Union[str, bytes]):
+    """Decode a base64 string (JSON endpoints) or raw file bytes (upload endpoints)."""
+    if isinstance(image_data, bytes):
+        return decode_image_bytes(image_data)
+    return decode_base64_image(image_data)
+
+
+def extract_face_features(image_data: Union[str, bytes]):
+    """
+    Decode an image and run detection, size check, embedding and quality
+    scoring on its first face. Results are cached by content fingerprint.
+    
+    Args:
+        image_data: Base64 encoded image, or raw image file bytes
+        
+    Returns:
+        Tuple of (face_location, embedding, quality). face_location is None if
+        no face was detected; embedding and quality are None if the face is too
+        small or no embedding could be extracted.
+    """
+    key = "|".join((
+        hashlib.sha256(image_data if isinstance(image_data, bytes) else image_data.encode()).hexdigest(),
+        face_detection_service.model,
+        face_recognition_service.model_id,
+        FACE_FEATURES_PREPROCESS_VERSION
+    ))
+    with _face_features_lock:
+        cached = _face_features_cache.get(key)
+    if cached is not None:
+        logger.debug("Using cached face features for uploaded image")
+        return cached
+    
+    image = _decode_image(image_data)
+    face_locations = face_detection_service.detect_faces(image)
+    
+    face_location = embedding = quality = None
+    if face_locations:
+        # Use first face
+        face_location = face_locations[0]
+        if check_face_size(face_location, min_size=100):
+            embedding, quality = face_recognition_service.extract_embedding_with_quality(image, face_location)
+            if embedding is None:
+                quality = None
+    
+    result = (face_location, embedding, quality)
+    with _face_features_lock:
+        _face_features_cache[key] = result
+    return result
+
 
 @router.post("/", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
-async def create_user(
+def create_user(
     user_data: UserCreate,
     db: Session = Depends(get_db),
-    current_user: AuthUser = Depends(require_role(UserRole.ADMIN))
+    current_user: AuthUserSnapshot = Depends(require_role(UserRole.ADMIN))
 ):
     """
     Create a new user.
@@ -83,7 +156,7 @@ async def create_user(
         
         # Get face count
         user_dict = user.to_dict()
-        return UserResponse(**user_dict)
+        return FastJSONResponse(user_dict, status_code=status.HTTP_201_CREATED)
         
     except HTTPException:
         raise
@@ -99,7 +172,7 @@ async def create_user(
 async def register_user_with_face(
     request: UserRegisterRequest,
     db: Session = Depends(get_db),
-    current_user: AuthUser = Depends(require_role(UserRole.ADMIN))
+    current_user: AuthUserSnapshot = Depends(require_role(UserRole.ADMIN))
 ):
     """
     Register a new user with face capture.
@@ -112,23 +185,50 @@ async def register_user_with_face(
     
     Returns the created user with face embeddings.
     """
+    return await _register_user_with_face(
+        db, request.name, request.email, request.employee_id, request.image_data
+    )
+
+
+@router.post("/register/raw", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
+async def register_user_with_face_raw(
+    name: str = Form(..., min_length=1, max_length=255),
+    email: Optional[str] = Form(None),
+    employee_id: Optional[str] = Form(None, max_length=100),
+    image: UploadFile = File(...),
+    db: Session = Depends(get_db),
+    current_user: AuthUserSnapshot = Depends(require_role(UserRole.ADMIN))
+):
+    """
+    Register a new user with face capture from a multipart/form-data upload.
+    
+    Same as POST /register, but the image is sent as a raw file part instead of
+    a base64 string (about 33% smaller, and no base64 decode on the server).
+    Preferred for new clients.
+    """
+    image_data = await image.read()
+    return await _register_user_with_face(db, name, email or None, employee_id or None, image_data)
+
+
+async def _register_user_with_face(
+    db: Session,
+    name: str,
+    email: Optional[str],
+    employee_id: Optional[str],
+    image_data: Union[str, bytes]
+) -> FastJSONResponse:
+    """Shared implementation of the /register endpoints."""
     try:
         # Validate input
-        validate_user_data(request.name, request.email)
-        validate_face_image(request.image_data)
-        
-        # Decode image
-        image = decode_base64_image(request.image_data)
+        validate_user_data(name, email)
+        validate_face_image(image_data)
         
-        # Detect faces
-        face_locations = face_detection_service.detect_faces(image)
+        # Decode, detect faces and extract embedding (cached per image)
+        face_location, embedding, quality = await run_cpu(extract_face_features, image_data)
         
-        if not face_locations:
+        if face_location is None:
             raise FaceDetectionError("No face detected in image. Please ensure the image contains a clear face.")
         
-        # Use first face
-        face_location = face_locations[0]
-        
         # Check face size
         if not check_face_size(face_location, min_size=100):
             raise HTTPException(
@@ -136,49 +236,33 @@ async def register_user_with_face(
                 detail="Face too small. Please ensure face is clearly visible."
             )
         
-        # Extract embedding
-        embedding = face_recognition_service.extract_embedding(image, face_location)
-        
         if embedding is None:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Could not extract face embedding"
             )
         
-        # Check for duplicates
-        duplicate = user_service.check_duplicate(db, embedding)
+        # Check for duplicates (reads the gallery and users through the
+        # request session, so it runs in the threadpool like other DB calls)
+        duplicate = await run_in_threadpool(user_service.check_duplicate, db, embedding)
         if duplicate:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=f"Face already registered for user: {duplicate.name} (ID: {duplicate.id})"
             )
         
-        # Calculate quality
-        quality = calculate_image_quality(image, face_location)
-        
-        # Create user
-        user = user_service.create_user(
-            db=db,
-            name=request.name,
-            email=request.email,
-            employee_id=request.employee_id
-        )
-        
-        # Add face embedding
-        user_service.add_face_embedding(
+        # Create user and face embedding in one transaction
+        user_dict = await run_in_threadpool(
+            user_service.create_user_with_embeddings,
             db=db,
-            user_id=user.id,
-            embedding=embedding,
-            capture_angle="frontal",
-            quality_score=quality
+            name=name,
+            email=email,
+            employee_id=employee_id,
+            embeddings=[(embedding, "frontal", quality)]
         )
         
-        # Refresh user to get face count
-        db.refresh(user)
-        user_dict = user.to_dict()
-        
-        logger.info(f"Registered user: {user.name} (ID: {user.id})")
-        return UserResponse(**user_dict)
+        logger.info(f"Registered user: {user_dict['name']} (ID: {user_dict['id']})")
+        return FastJSONResponse(user_dict, status_code=status.HTTP_201_CREATED)
         
     except (ValidationError, NotFoundError, FaceDetectionError, AuthenticationError, AuthorizationError) as e:
         raise handle_exception(e)
@@ -229,45 +313,39 @@ async def register_user_multi_angle(
                 detail="At least one image is required (frontal_image, left_image, right_image, or images list)"
             )
         
-        # Process all images
-        embeddings = []
-        quality_scores = []
-        
-        for img_data, angle in zip(images_to_process, angles):
+        # Process all images concurrently (each decode+detect+embed runs in CPU_POOL)
+        def process_image(img_data: str, angle: str):
             try:
-                image = decode_base64_image(img_data)
-                
-                # Detect faces
-                face_locations = face_detection_service.detect_faces(image)
+                face_location, embedding, quality = extract_face_features(img_data)
                 
-                if not face_locations:
+                if face_location is None:
                     logger.warning(f"No face detected in {angle} image, skipping")
-                    continue
-                
-                # Use first face
-                face_location = face_locations[0]
+                    return None
                 
                 # Check face size
                 if not check_face_size(face_location, min_size=100):
                     logger.warning(f"Face too small in {angle} image, skipping")
-                    continue
-                
-                # Extract embedding
-                embedding = face_recognition_service.extract_embedding(image, face_location)
+                    return None
                 
                 if embedding is None:
                     logger.warning(f"Could not extract embedding from {angle} image, skipping")
-                    continue
-                
-                # Calculate quality
-                quality = calculate_image_quality(image, face_location)
+                    return None
                 
-                embeddings.append((embedding, angle, quality))
-                quality_scores.append(quality)
+                return (embedding, angle, quality)
                 
             except Exception as e:
                 logger.warning(f"Error processing {angle} image: {e}, skipping")
-                continue
+                return None
+        
+        # Process images in order until one yields an embedding, so a duplicate
+        # is rejected before the remaining images are decoded and embedded
+        embeddings = []
+        remaining = list(zip(images_to_process, angles))
+        while remaining and not embeddings:
+            img_data, angle = remaining.pop(0)
+            result = await run_cpu(process_image, img_data, angle)
+            if result is not None:
+                embeddings.append(result)
         
         if not embeddings:
             raise HTTPException(
@@ -277,53 +355,36 @@ async def register_user_multi_angle(
         
         # Check for duplicates using first embedding
         first_embedding = embeddings[0][0]
-        duplicate = user_service.check_duplicate(db, first_embedding)
+        duplicate = await run_in_threadpool(user_service.check_duplicate, db, first_embedding)
         if duplicate:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=f"Face already registered for user: {duplicate.name} (ID: {duplicate.id})"
             )
         
-        # Create user
-        user = user_service.create_user(
+        # Not a duplicate: process the remaining images concurrently
+        results = await asyncio.gather(*[
+            run_cpu(process_image, img_data, angle)
+            for img_data, angle in remaining
+        ])
+        embeddings.extend(result for result in results if result is not None)
+        quality_scores = [quality for _, _, quality in embeddings]
+        
+        # Create user and all face embeddings in one transaction
+        user_dict = await run_in_threadpool(
+            user_service.create_user_with_embeddings,
             db=db,
             name=request.name,
             email=request.email,
-            employee_id=request.employee_id
+            employee_id=request.employee_id,
+            embeddings=embeddings
         )
-        
-        # Add all face embeddings
-        added_count = 0
-        for embedding, angle, quality in embeddings:
-            try:
-                user_service.add_face_embedding(
-                    db=db,
-                    user_id=user.id,
-                    embedding=embedding,
-                    capture_angle=angle,
-                    quality_score=quality
-                )
-                added_count += 1
-            except Exception as e:
-                logger.error(f"Error adding {angle} embedding: {e}")
-        
-        if added_count == 0:
-            # Rollback user creation if no embeddings added
-            db.delete(user)
-            db.commit()
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="Failed to add face embeddings"
-            )
-        
-        # Refresh user to get face count
-        db.refresh(user)
-        user_dict = user.to_dict()
+        added_count = len(embeddings)
         
         avg_quality = sum(quality_scores) / len(quality_scores) if quality_scores else 0.0
         
-        logger.info(f"Registered user with {added_count} angles: {user.name} (ID: {user.id}, avg quality: {avg_quality:.2f})")
-        return UserResponse(**user_dict)
+        logger.info(f"Registered user with {added_count} angles: {user_dict['name']} (ID: {user_dict['id']}, avg quality: {avg_quality:.2f})")
+        return FastJSONResponse(user_dict, status_code=status.HTTP_201_CREATED)
         
     except HTTPException:
         raise
@@ -339,7 +400,7 @@ async def register_user_multi_angle(
 async def register_user_with_video(
     request: VideoRegistrationRequest,
     db: Session = Depends(get_db),
-    current_user: AuthUser = Depends(require_role(UserRole.ADMIN))
+    current_user: AuthUserSnapshot = Depends(require_role(UserRole.ADMIN))
 ):
     """
     Register a new user with video capture.
@@ -359,6 +420,47 @@ async def register_user_with_video(
     
     Returns the created user with face embeddings and validation results.
     """
+    return await _register_user_with_video(
+        db, request.name, request.email, request.employee_id, request.video_data,
+        min_frames_with_face=request.min_frames_with_face,
+        min_quality_score=request.min_quality_score
+    )
+
+
+@router.post("/register/video/raw", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
+async def register_user_with_video_raw(
+    name: str = Form(..., min_length=1, max_length=255),
+    email: Optional[str] = Form(None),
+    employee_id: Optional[str] = Form(None, max_length=100),
+    min_frames_with_face: int = Form(5, ge=3, le=20),
+    min_quality_score: float = Form(0.5, ge=0.0, le=1.0),
+    video: UploadFile = File(...),
+    db: Session = Depends(get_db),
+    current_user: AuthUserSnapshot = Depends(require_role(UserRole.ADMIN))
+):
+    """
+    Register a new user with video capture from a multipart/form-data upload.
+    
+    Same as POST /register/video, but the video is sent as a raw file part
+    instead of a base64 string. Preferred for new clients.
+    """
+    return await _register_user_with_video(
+        db, name, email or None, employee_id or None, video.file,
+        min_frames_with_face=min_frames_with_face,
+        min_quality_score=min_quality_score
+    )
+
+
+async def _register_user_with_video(
+    db: Session,
+    name: str,
+    email: Optional[str],
+    employee_id: Optional[str],
+    video_data: Union[str, BinaryIO],
+    min_frames_with_face: int,
+    min_quality_score: float
+) -> FastJSONResponse:
+    """Shared implementation of the /register/video endpoints."""
     if not FACE_RECOGNITION_AVAILABLE:
         raise HTTPException(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
@@ -367,15 +469,36 @@ async def register_user_with_video(
     
     try:
         # Validate input
-        validate_user_data(request.name, request.email)
-        
-        # Decode video
-        logger.info(f"Decoding video for user registration: {request.name}")
-        video_data = decode_base64_video(request.video_data)
+        validate_user_data(name, email)
+        
+        # Spool the video to a temp file in chunks (base64-decoded, or copied
+        # from the upload) so the decoded video is never held in memory whole
+        logger.info(f"Decoding video for user registration: {name}")
+        try:
+            if isinstance(video_data, str):
+                video_path = await run_cpu(decode_base64_video_to_file, video_data)
+            else:
+                video_path = await run_cpu(save_video_to_file, video_data)
+        except ValueError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e)
+            )
         
-        # Extract frames from video
+        # Extract frames and detect faces in them (batched) as one pipeline:
+        # frames are decoded in the background while earlier ones are
+        # detected. Validation and frame selection below reuse the detections.
         logger.info("Extracting frames from video...")
-        frames = extract_frames_from_video(video_data, max_frames=30, frame_interval=5)
+        try:
+            frames, face_locations_per_frame = await run_cpu(
+                extract_frames_and_detect_faces,
+                video_path,
+                face_detection_service.detect_faces_batch,
+                max_frames=30,
+                frame_interval=5
+            )
+        finally:
+            os.unlink(video_path)
         
         if not frames:
             raise HTTPException(
@@ -387,11 +510,13 @@ async def register_user_with_video(
         
         # Validate video meets requirements
         logger.info("Validating video for face detection...")
-        validation_result = validate_video_for_face_detection(
+        validation_result = await run_cpu(
+            validate_video_for_face_detection,
             frames,
-            min_frames_with_face=request.min_frames_with_face,
+            min_frames_with_face=min_frames_with_face,
             min_face_size=settings.MIN_FACE_SIZE,
-            min_quality_score=request.min_quality_score
+            min_quality_score=min_quality_score,
+            face_locations_per_frame=face_locations_per_frame
         )
         
         if not validation_result["valid"]:
@@ -409,11 +534,13 @@ async def register_user_with_video(
         
         # Get best frames for registration
         logger.info("Selecting best frames for registration...")
-        best_frames = get_best_frames_from_video(
+        best_frames = await run_cpu(
+            get_best_frames_from_video,
             frames,
             num_frames=3,  # Use top 3 frames
             min_face_size=settings.MIN_FACE_SIZE,
-            min_quality_score=request.min_quality_score
+            min_quality_score=min_quality_score,
+            face_locations_per_frame=face_locations_per_frame
         )
         
         if not best_frames:
@@ -424,16 +551,36 @@ async def register_user_with_video(
         
         logger.info(f"Selected {len(best_frames)} best frames for registration")
         
-        # Process frames and extract embeddings
         embeddings = []
         quality_scores = []
         angles = ["frontal", "left", "right"]  # Assign angles to frames
         
-        for idx, (frame, quality, face_location) in enumerate(best_frames):
+        # Embed best frames in order until one succeeds and check that for
+        # duplicates before spending compute on the remaining frames
+        frame_embeddings = []
+        for frame, _, face_location in best_frames:
+            embedding = await run_cpu(face_recognition_service.extract_embedding, frame, face_location)
+            frame_embeddings.append(embedding)
+            if embedding is not None:
+                break
+        
+        first_embedding = frame_embeddings[-1]
+        if first_embedding is not None:
+            duplicate = await run_in_threadpool(user_service.check_duplicate, db, first_embedding)
+            if duplicate:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Face already registered for user: {duplicate.name} (ID: {duplicate.id})"
+                )
+        
+        # Not a duplicate: embed the remaining frames in one batched call
+        frame_embeddings.extend(await run_cpu(
+            face_recognition_service.extract_embeddings_batch,
+            [(frame, face_location) for frame, _, face_location in best_frames[len(frame_embeddings):]]
+        ))
+        
+        for idx, ((frame, quality, face_location), embedding) in enumerate(zip(best_frames, frame_embeddings)):
             try:
-                # Extract embedding
-                embedding = face_recognition_service.extract_embedding(frame, face_location)
-                
                 if embedding is None:
                     logger.warning(f"Could not extract embedding from frame {idx}, skipping")
                     continue
@@ -456,61 +603,27 @@ async def register_user_with_video(
         
         logger.info(f"Extracted {len(embeddings)} embeddings from video")
         
-        # Check for duplicates using first embedding
-        first_embedding = embeddings[0][0]
-        duplicate = user_service.check_duplicate(db, first_embedding)
-        if duplicate:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Face already registered for user: {duplicate.name} (ID: {duplicate.id})"
-            )
-        
-        # Create user
-        user = user_service.create_user(
+        # Create user and all face embeddings in one transaction
+        user_dict = await run_in_threadpool(
+            user_service.create_user_with_embeddings,
             db=db,
-            name=request.name,
-            email=request.email,
-            employee_id=request.employee_id
+            name=name,
+            email=email,
+            employee_id=employee_id,
+            embeddings=embeddings
         )
-        
-        # Add all face embeddings
-        added_count = 0
-        for embedding, angle, quality in embeddings:
-            try:
-                user_service.add_face_embedding(
-                    db=db,
-                    user_id=user.id,
-                    embedding=embedding,
-                    capture_angle=angle,
-                    quality_score=quality
-                )
-                added_count += 1
-            except Exception as e:
-                logger.error(f"Error adding {angle} embedding: {e}")
-        
-        if added_count == 0:
-            # Rollback user creation if no embeddings added
-            db.delete(user)
-            db.commit()
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="Failed to add face embeddings"
-            )
-        
-        # Refresh user to get face count
-        db.refresh(user)
-        user_dict = user.to_dict()
+        added_count = len(embeddings)
         
         avg_quality = sum(quality_scores) / len(quality_scores) if quality_scores else 0.0
         
-        logger.info(f"Registered user with video: {user.name} (ID: {user.id}, {added_count} embeddings, avg quality: {avg_quality:.2f})")
+        logger.info(f"Registered user with video: {user_dict['name']} (ID: {user_dict['id']}, {added_count} embeddings, avg quality: {avg_quality:.2f})")
         
         # Log validation info (for debugging)
         logger.info(f"Video registration details: {validation_result['frames_analyzed']} frames analyzed, "
                    f"{validation_result['frames_meeting_requirements']} met requirements, "
                    f"best quality: {validation_result['best_frame_quality']:.2f}")
         
-        return UserResponse(**user_dict)
+        return FastJSONResponse(user_dict, status_code=status.HTTP_201_CREATED)
         
     except HTTPException:
         raise
@@ -523,10 +636,10 @@ async def register_user_with_video(
 
 
 @router.get("/", response_model=List[UserResponse])
-async def get_all_users(
+def get_all_users(
     active_only: bool = True,
     db: Session = Depends(get_db),
-    current_user: AuthUser = Depends(get_current_user)  # Require auth but any role
+    current_user: AuthUserSnapshot = Depends(get_current_user)  # Require auth but any role
 ):
     """
     Get all users.
@@ -536,7 +649,8 @@ async def get_all_users(
     """
     try:
         users = user_service.get_all_users(db, active_only=active_only)
-        return [UserResponse(**user.to_dict()) for user in users]
+        # to_dict() already matches UserResponse; encode the rows directly
+        return FastJSONResponse([user.to_dict() for user in users])
     except Exception as e:
         logger.error(f"Error getting users: {e}")
         raise HTTPException(
@@ -546,10 +660,10 @@ async def get_all_users(
 
 
 @router.get("/{user_id}", response_model=UserResponse)
-async def get_user(
+def get_user(
     user_id: int,
     db: Session = Depends(get_db),
-    current_user: AuthUser = Depends(get_current_user)
+    current_user: AuthUserSnapshot = Depends(get_current_user)
 ):
     """Get a specific user by ID."""
     user = user_service.get_user(db, user_id)
@@ -559,11 +673,11 @@ async def get_user(
             detail=f"User with ID {user_id} not found"
         )
     
-    return UserResponse(**user.to_dict())
+    return FastJSONResponse(user.to_dict())
 
 
 @router.put("/{user_id}", response_model=UserResponse)
-async def update_user(
+def update_user(
     user_id: int,
     user_data: UserUpdate,
     db: Session = Depends(get_db)
@@ -598,8 +712,10 @@ async def update_user(
         
         db.commit()
         db.refresh(user)
+        if user_data.is_active is not None:
+            invalidate_embedding_index()
         
-        return UserResponse(**user.to_dict())
+        return FastJSONResponse(user.to_dict())
         
     except HTTPException:
         raise
@@ -613,10 +729,10 @@ async def update_user(
 
 
 @router.delete("/{user_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_user(
+def delete_user(
     user_id: int,
     db: Session = Depends(get_db),
-    current_user: AuthUser = Depends(require_role(UserRole.ADMIN))
+    current_user: AuthUserSnapshot = Depends(require_role(UserRole.ADMIN))
 ):
     """Delete a user and all associated data (face embeddings, logs)."""
     success = user_service.delete_user(db, user_id)
@@ -679,6 +795,23 @@ async def detect_faces_endpoint(
         "image_size": [640, 480]
     }
     """
+    return await _detect_faces(request.get("image_data"))
+
+
+@router.post("/detect-faces/raw")
+async def detect_faces_raw_endpoint(
+    image: UploadFile = File(...),
+    db: Session = Depends(get_db)
+):
+    """
+    Same as POST /detect-faces, but the image is sent as a multipart/form-data
+    file part instead of a base64 string. Preferred for new clients.
+    """
+    return await _detect_faces(await image.read())
+
+
+async def _detect_faces(image_data: Union[str, bytes, None]) -> dict:
+    """Shared implementation of the /detect-faces endpoints."""
     if not FACE_RECOGNITION_AVAILABLE:
         raise HTTPException(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
@@ -686,7 +819,6 @@ async def detect_faces_endpoint(
         )
     
     try:
-        image_data = request.get("image_data")
         if not image_data:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -694,12 +826,12 @@ async def detect_faces_endpoint(
             )
         
         # Decode image
-        image = decode_base64_image(image_data)
+        image = await run_cpu(_decode_image, image_data)
         height, width = image.shape[:2]
         
         # Enhance image for better detection (especially in low-light conditions)
         # This uses CLAHE and adaptive brightness/contrast adjustment
-        enhanced_image = enhance_image_for_detection(image)
+        enhanced_image = await run_cpu(enhance_image_for_detection, image)
         
         # Resize image if too large for faster processing (max 960px for detection)
         # This speeds up detection significantly while maintaining accuracy
@@ -707,7 +839,9 @@ async def detect_faces_endpoint(
         processed_image = resize_image(enhanced_image, max_size=960)
         
         # Detect faces with landmarks on enhanced and resized image
-        face_locations, face_landmarks_list = face_detection_service.detect_faces_with_landmarks(processed_image)
+        face_locations, face_landmarks_list = await run_cpu(
+            face_detection_service.detect_faces_with_landmarks, processed_image
+        )
         
         # Scale face locations back to original image size if image was resized
         if processed_image.shape != image.shape:
@@ -758,7 +892,7 @@ async def detect_faces_endpoint(
             )
             
             # Calculate quality score
-            quality_score = calculate_image_quality(image, face_loc)
+            quality_score = await run_cpu(calculate_image_quality, image, face_loc)
             
             faces.append({
                 "bbox": [int(top), int(right), int(bottom), int(left)],
@@ -785,7 +919,7 @@ async def detect_faces_endpoint(
 
 
 @router.get("/{user_id}/faces", response_model=List[FaceEmbeddingResponse])
-async def get_user_faces(
+def get_user_faces(
     user_id: int,
     db: Session = Depends(get_db)
 ):
@@ -798,7 +932,8 @@ async def get_user_faces(
         )
     
     embeddings = user.face_embeddings
-    return [FaceEmbeddingResponse(**emb.to_dict()) for emb in embeddings]
+    # to_dict() already matches FaceEmbeddingResponse; encode the rows directly
+    return FastJSONResponse([emb.to_dict() for emb in embeddings])
 
 
 @router.post("/{user_id}/faces", response_model=FaceEmbeddingResponse, status_code=status.HTTP_201_CREATED)
@@ -816,7 +951,7 @@ async def add_user_face(
         "capture_angle": "frontal"
     }
     """
-    user = user_service.get_user(db, user_id)
+    user = await run_in_threadpool(user_service.get_user, db, user_id)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -824,19 +959,14 @@ async def add_user_face(
         )
     
     try:
-        # Decode image
-        image = decode_base64_image(request.image_data)
-        
-        # Detect face
-        face_locations = face_detection_service.detect_faces(image)
-        if not face_locations:
+        # Decode, detect face and extract embedding (cached per image)
+        face_location, embedding, quality = await run_cpu(extract_face_features, request.image_data)
+        if face_location is None:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="No face detected in image"
             )
         
-        face_location = face_locations[0]
-        
         # Check face size
         if not check_face_size(face_location, min_size=100):
             raise HTTPException(
@@ -844,19 +974,15 @@ async def add_user_face(
                 detail="Face too small"
             )
         
-        # Extract embedding
-        embedding = face_recognition_service.extract_embedding(image, face_location)
         if embedding is None:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Could not extract face embedding"
             )
         
-        # Calculate quality
-        quality = calculate_image_quality(image, face_location)
-        
         # Add embedding
-        face_emb = user_service.add_face_embedding(
+        face_emb = await run_in_threadpool(
+            user_service.add_face_embedding,
             db=db,
             user_id=user_id,
             embedding=embedding,
@@ -864,7 +990,7 @@ async def add_user_face(
             quality_score=quality
         )
         
-        return FaceEmbeddingResponse(**face_emb.to_dict())
+        return FastJSONResponse(face_emb.to_dict(), status_code=status.HTTP_201_CREATED)
         
     except HTTPException:
         raise
@@ -3,15 +3,21 @@ Main FastAPI application entry point.
 Sets up the API server with WebSocket support.
 """
 
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect, Request, Depends
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect, Request, Response, Depends
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
 from fastapi.exceptions import RequestValidationError
+from fastapi.encoders import jsonable_encoder
 from contextlib import asynccontextmanager
 from sqlalchemy.orm import Session
+from typing import Optional
+from starlette.concurrency import run_in_threadpool
+import asyncio
 import logging
+import numpy as np
 import traceback
 import os
+from time import monotonic
+from uuid import uuid4
 
 from app.config import settings
 
@@ -22,16 +28,24 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-from app.database import init_db, engine, Base, get_db
+# Level is fixed at startup; checked once instead of per frame. Hot-path log
+# calls below use %-style args so messages are only formatted when emitted.
+_LOG_DEBUG = logger.isEnabledFor(logging.DEBUG)
+
+from app.database import init_db, engine, Base, get_db, get_pool_status, SessionManager
+from app.services.session_summary import create_sessions_view, run_sessions_view_refresher
+from app.utils.concurrency import run_cpu
+from app.utils.responses import FastJSONResponse, dumps_text, loads_text
 from app.models import User, FaceEmbedding, RecognitionLog
+from app.models.auth import AuthUser, UserRole
 from app.services.user_service import UserService
 from app.api import users, logs, search, auth
 
 # Optional face recognition imports (backend can run without them for auth)
 try:
-    from app.services.face_detection import FaceDetectionService
+    from app.services.face_detection import FaceDetectionService, landmarks_to_dict
     from app.services.face_recognition import FaceRecognitionService
-    from app.services.face_tracking import FaceTrackingService
+    from app.services.face_tracking import FaceTrackingService, RecognizedFaces
     import face_recognition
     from app.utils.image_processing import (
         decode_base64_image, resize_image, check_face_size, 
@@ -45,9 +59,31 @@ except ImportError as e:
     FaceDetectionService = None
     FaceRecognitionService = None
     FaceTrackingService = None
+    RecognizedFaces = None
     FACE_RECOGNITION_AVAILABLE = False
 
 
+def _log_exception(message: str, exc: BaseException) -> None:
+    """
+    Log an error from a hot path (request/frame handlers).
+    
+    Formatting a traceback is expensive and runs on the event loop, so full
+    tracebacks are only logged at DEBUG; otherwise a one-line
+    "ExceptionType: message" fingerprint is logged.
+    """
+    if _LOG_DEBUG:
+        logger.error("%s: %s", message, exc, exc_info=exc)
+    else:
+        logger.error("%s: %s: %s", message, type(exc).__name__, exc)
+
+
+def _warmup_face_models() -> None:
+    """Run detection and embedding once on a blank 640x640 image."""
+    image = np.zeros((640, 640, 3), dtype=np.uint8)
+    face_detection_service.detect_faces(image)
+    face_recognition_service.extract_embedding(image, (0, 150, 150, 0))
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """
@@ -75,10 +111,29 @@ async def lifespan(app: FastAPI):
         logger.warning("Server will start but database features will be unavailable.")
         logger.warning("Please ensure PostgreSQL is running and DATABASE_URL is correct in .env")
     
+    # Run one dummy pass through the face models so the first real request
+    # doesn't pay first-call allocation costs
+    if FACE_RECOGNITION_AVAILABLE:
+        try:
+            await run_cpu(_warmup_face_models)
+            logger.info("Face models warmed up")
+        except Exception as e:
+            logger.warning(f"Face model warmup failed: {e}")
+    
+    # Precomputed session summaries for /api/logs/sessions (PostgreSQL only)
+    sessions_refresher = None
+    try:
+        if create_sessions_view(engine):
+            sessions_refresher = asyncio.create_task(run_sessions_view_refresher(engine))
+    except Exception as e:
+        logger.warning(f"Sessions view unavailable: {e}")
+    
     yield
     
     # Shutdown
     logger.info("Shutting down application")
+    if sessions_refresher is not None:
+        sessions_refresher.cancel()
 
 
 # Create FastAPI application
@@ -88,6 +143,8 @@ app = FastAPI(
     description="Real-time facial recognition system backend",
     lifespan=lifespan,
     debug=settings.DEBUG,
+    # orjson-encoded responses app-wide (falls back to the stdlib encoder)
+    default_response_class=FastJSONResponse,
 )
 
 # CORS middleware (allow mobile app to connect)
@@ -108,6 +165,20 @@ app.add_middleware(
 # Log CORS configuration
 logger.info(f"CORS configured with allowed origins: {allowed_origins}")
 
+# Precomputed for the exception handlers below (O(1) origin lookups)
+_allowed_origin_set = frozenset(allowed_origins)
+_allow_all_origins = "*" in _allowed_origin_set
+
+
+def _cors_headers(origin: Optional[str]) -> dict:
+    """CORS headers for an error response to the given request origin."""
+    if _allow_all_origins:
+        return {"Access-Control-Allow-Origin": origin or "*"}
+    if origin in _allowed_origin_set:
+        return {"Access-Control-Allow-Origin": origin}
+    return {}
+
+
 # Global exception handler to ensure CORS headers are always sent
 # Note: This only catches non-HTTPException errors (HTTPException is handled by FastAPI)
 from fastapi import HTTPException as FastAPIHTTPException
@@ -123,20 +194,15 @@ async def global_exception_handler(request: Request, exc: Exception):
     if isinstance(exc, FastAPIHTTPException):
         raise exc
     
-    logger.error(f"Unhandled exception: {exc}", exc_info=True)
+    _log_exception("Unhandled exception", exc)
     
     # Get the origin from request headers
     origin = request.headers.get("origin")
     
     # Check if origin is allowed
-    if origin and (origin in allowed_origins or "*" in allowed_origins):
-        headers = {"Access-Control-Allow-Origin": origin}
-    elif "*" in allowed_origins:
-        headers = {"Access-Control-Allow-Origin": "*"}
-    else:
-        headers = {}
+    headers = _cors_headers(origin)
     
-    return JSONResponse(
+    return FastJSONResponse(
         status_code=500,
         content={
             "error": "INTERNAL_SERVER_ERROR",
@@ -152,20 +218,20 @@ async def validation_exception_handler(request: Request, exc: RequestValidationE
     """Handle validation errors with CORS headers."""
     origin = request.headers.get("origin")
     
-    if origin and (origin in allowed_origins or "*" in allowed_origins):
-        headers = {"Access-Control-Allow-Origin": origin}
-    elif "*" in allowed_origins:
-        headers = {"Access-Control-Allow-Origin": "*"}
-    else:
-        headers = {}
+    headers = _cors_headers(origin)
     
-    return JSONResponse(
+    return FastJSONResponse(
         status_code=422,
-        content={"detail": exc.errors()},
+        content={"detail": jsonable_encoder(exc.errors())},
         headers=headers
     )
 
 
+# Connection churn is summarized at INFO every N events or T seconds
+WS_LOG_SUMMARY_EVERY = 100
+WS_LOG_SUMMARY_SECONDS = 60.0
+
+
 # WebSocket connection manager
 class ConnectionManager:
     """
@@ -174,41 +240,63 @@ class ConnectionManager:
     """
     
     def __init__(self):
-        self.active_connections: list[WebSocket] = []
+        self.active_connections: set[WebSocket] = set()
+        # Connect/disconnect events are logged at INFO as a periodic summary
+        self._connects = 0
+        self._disconnects = 0
+        self._last_summary = monotonic()
+    
+    def _log_connection_event(self, event: str):
+        """Log one connect/disconnect at DEBUG and a running summary at INFO."""
+        logger.debug("WebSocket %s. Total connections: %d", event, len(self.active_connections))
+        
+        events = self._connects + self._disconnects
+        if events % WS_LOG_SUMMARY_EVERY == 0 or monotonic() - self._last_summary >= WS_LOG_SUMMARY_SECONDS:
+            self._last_summary = monotonic()
+            logger.info(
+                "WebSocket connects=%d disconnects=%d active=%d",
+                self._connects, self._disconnects, len(self.active_connections)
+            )
     
     async def connect(self, websocket: WebSocket):
         """Accept a new WebSocket connection."""
         await websocket.accept()
-        self.active_connections.append(websocket)
-        logger.info(f"WebSocket connected. Total connections: {len(self.active_connections)}")
+        self.active_connections.add(websocket)
+        self._connects += 1
+        self._log_connection_event("connected")
     
     def disconnect(self, websocket: WebSocket):
         """Remove a WebSocket connection."""
+        # May be called more than once for the same socket; count it once
         if websocket in self.active_connections:
-            self.active_connections.remove(websocket)
-        logger.info(f"WebSocket disconnected. Total connections: {len(self.active_connections)}")
+            self.active_connections.discard(websocket)
+            self._disconnects += 1
+            self._log_connection_event("disconnected")
     
     async def send_personal_message(self, message: dict, websocket: WebSocket):
         """Send a message to a specific WebSocket connection."""
         try:
-            await websocket.send_json(message)
+            await websocket.send_text(dumps_text(message))
         except Exception as e:
-            logger.error(f"Error sending message: {e}")
+            logger.error("Error sending message: %s", e)
             self.disconnect(websocket)
     
     async def broadcast(self, message: dict):
         """Broadcast a message to all active connections."""
-        disconnected = []
-        for connection in self.active_connections:
-            try:
-                await connection.send_json(message)
-            except Exception as e:
-                logger.error(f"Error broadcasting to connection: {e}")
-                disconnected.append(connection)
+        # Encode once and send to everyone concurrently, so one slow client
+        # doesn't hold up the rest
+        text = dumps_text(message)
+        connections = list(self.active_connections)
+        results = await asyncio.gather(
+            *(connection.send_text(text) for connection in connections),
+            return_exceptions=True
+        )
         
         # Remove disconnected connections
-        for conn in disconnected:
-            self.disconnect(conn)
+        for connection, result in zip(connections, results):
+            if isinstance(result, Exception):
+                logger.error("Error broadcasting to connection: %s", result)
+                self.disconnect(connection)
 
 
 # Global connection manager instance
@@ -227,6 +315,147 @@ else:
 
 user_service = UserService()
 
+# Recognition logs are buffered per WebSocket session and written in batches
+RECOGNITION_LOG_FLUSH_ROWS = 64
+RECOGNITION_LOG_FLUSH_SECONDS = 0.5
+
+
+def _flush_recognition_logs(rows: list) -> None:
+    """Write buffered recognition logs in one transaction (runs in a worker thread)."""
+    try:
+        with SessionManager() as db:
+            user_service.create_recognition_logs(db, rows)
+    except Exception as e:
+        logger.error("Error writing %d recognition log(s): %s", len(rows), e)
+
+
+def _process_frame(base64_image: str, frame_id=None) -> Optional[tuple]:
+    """
+    Decode a WebSocket frame and extract its faces (blocking; run via run_cpu).
+    
+    Args:
+        base64_image: Base64 encoded frame
+        frame_id: Client frame ID (for logging)
+        
+    Returns:
+        (width, height, valid_faces, face_encodings, face_landmarks_list) of the
+        resized frame (valid_faces is empty if no usable face was found), or
+        None if the frame should be skipped without a reply
+    """
+    # Decode image with validation and quality checks
+    try:
+        image = decode_base64_image(base64_image)
+    except ValueError as e:
+        logger.error("Failed to decode image: %s", e)
+        return None
+    
+    # Validate decoded image
+    if image is None or image.size == 0:
+        logger.error("Decoded image is empty or None")
+        return None
+    
+    # Log image properties before processing
+    height, width = image.shape[:2] if len(image.shape) >= 2 else (0, 0)
+    # (guarded: mean/std are full passes over the frame)
+    if _LOG_DEBUG:
+        logger.debug("Processing frame %s: image=%dx%d, dtype=%s, mean=%.2f, std=%.2f",
+                     frame_id, width, height, image.dtype, image.mean(), image.std())
+    
+    # Enhance image for better detection (CLAHE + adaptive adjustments)
+    image = enhance_image_for_detection(image)
+    
+    # Resize if too large (optimize for speed while preserving detail)
+    original_size = max(width, height) if width > 0 and height > 0 else 0
+    image = resize_image(image, max_size=1280)
+    resized_height, resized_width = image.shape[:2] if len(image.shape) >= 2 else (0, 0)
+    if original_size != max(resized_width, resized_height):
+        logger.debug("Image resized: %dpx → %dpx for detection", original_size, max(resized_width, resized_height))
+    
+    # Detect faces with enhanced upsampling (now set to 2x in face_detection.py)
+    logger.debug("Starting face detection on %dx%d enhanced image", resized_width, resized_height)
+    face_locations = face_detection_service.detect_faces(image)
+    
+    # Log detection results
+    if not face_locations:
+        logger.warning("⚠️ No faces detected in frame %s (image: %dx%dpx, model: %s)",
+                       frame_id, resized_width, resized_height, face_detection_service.model)
+        return resized_width, resized_height, [], [], []
+    
+    logger.info("✅ Detected %d face(s) in frame %s", len(face_locations), frame_id)
+    
+    # Filter faces by minimum size (use same as registration: 100px)
+    # This matches the registration requirement for consistency
+    valid_faces = []
+    filtered_count = 0
+    for idx, face_loc in enumerate(face_locations):
+        top, right, bottom, left = face_loc
+        face_width = right - left
+        face_height = bottom - top
+        
+        if check_face_size(face_loc, settings.MIN_FACE_SIZE):
+            valid_faces.append(face_loc)
+            logger.debug("  Face %d: %dx%dpx - ✅ Valid (>= %dpx)", idx + 1, face_width, face_height, settings.MIN_FACE_SIZE)
+        else:
+            filtered_count += 1
+            logger.debug("  Face %d: %dx%dpx - ❌ Filtered (< %dpx minimum)", idx + 1, face_width, face_height, settings.MIN_FACE_SIZE)
+    
+    if filtered_count > 0:
+        logger.warning("Filtered out %d face(s) below minimum size (%dpx)", filtered_count, settings.MIN_FACE_SIZE)
+    
+    if not valid_faces:
+        logger.warning("⚠️ No valid faces after size filtering in frame %s", frame_id)
+        return resized_width, resized_height, [], [], []
+    
+    logger.info("✅ %d valid face(s) after filtering", len(valid_faces))
+    
+    # Extract face embeddings
+    face_encodings = face_recognition_service.extract_multiple_embeddings(image, valid_faces)
+    
+    if len(face_encodings) != len(valid_faces):
+        logger.warning("Mismatch: %d faces but %d encodings", len(valid_faces), len(face_encodings))
+        return None
+    
+    # Get landmarks for valid faces
+    try:
+        face_landmarks_list = [
+            landmarks_to_dict(points)
+            for points in face_detection_service.detect_landmarks(image, valid_faces)
+        ]
+    except Exception as e:
+        logger.warning("Error getting landmarks: %s", e)
+        face_landmarks_list = []
+    
+    return resized_width, resized_height, valid_faces, face_encodings, face_landmarks_list
+
+
+def _match_faces(face_encodings: list) -> "RecognizedFaces":
+    """
+    Identify each face encoding against the database (blocking; run in a thread).
+    
+    Args:
+        face_encodings: Face embeddings from _process_frame
+        
+    Returns:
+        RecognizedFaces with one entry per encoding (user ID -1 if unknown)
+    """
+    # Short-lived session: don't pin a pooled connection for the whole socket.
+    # All faces of the frame are matched in one pass over the cached matrix.
+    with SessionManager() as db:
+        matches = face_recognition_service.find_best_matches(face_encodings, db)
+    
+    # Fill preallocated arrays instead of building a tuple per face
+    recognized = RecognizedFaces.unknown(len(matches))
+    for i, match in enumerate(matches):
+        if match:
+            recognized.user_ids[i], recognized.user_names[i], recognized.confidences[i] = match
+    
+    # Apply confidence boost for high-quality matches
+    # This makes recognition sharper and more reliable
+    confidences = recognized.confidences
+    excellent = confidences > 0.9
+    confidences[excellent] = np.minimum(1.0, confidences[excellent] * 1.05)  # Small boost for excellent matches
+    return recognized
+
 # Include API routers
 app.include_router(auth.router)
 app.include_router(users.router)
@@ -234,45 +463,53 @@ app.include_router(logs.router)
 app.include_router(search.router)
 
 
+# Static API info, encoded once at import
+_ROOT_RESPONSE_BODY = FastJSONResponse({
+    "name": settings.APP_NAME,
+    "version": settings.APP_VERSION,
+    "status": "running",
+    "endpoints": {
+        "websocket": "/ws/recognize",
+        "docs": "/docs",
+        "health": "/health",
+        "api": {
+            "users": "/api/users",
+            "logs": "/api/logs",
+            "search": "/api/search",
+        }
+    }
+}).body
+
+_HEALTH_TEMPLATE = {
+    "status": "healthy",
+    "database": "connected",  # TODO: Add actual database health check
+}
+
+
 @app.get("/")
 async def root():
     """Root endpoint - API information."""
-    return {
-        "name": settings.APP_NAME,
-        "version": settings.APP_VERSION,
-        "status": "running",
-        "endpoints": {
-            "websocket": "/ws/recognize",
-            "docs": "/docs",
-            "health": "/health",
-            "api": {
-                "users": "/api/users",
-                "logs": "/api/logs",
-                "search": "/api/search",
-            }
-        }
-    }
+    return Response(content=_ROOT_RESPONSE_BODY, media_type="application/json")
 
 
 @app.get("/health")
 async def health_check():
     """Health check endpoint."""
-    return {
-        "status": "healthy",
-        "database": "connected",  # TODO: Add actual database health check
+    # Returned as a response directly: skips jsonable_encoder for probe traffic
+    return FastJSONResponse({
+        **_HEALTH_TEMPLATE,
         "active_connections": len(manager.active_connections),
-    }
+        "db_pool": get_pool_status(),
+    })
 
 
 @app.get("/debug/users")
-async def debug_users(db: Session = Depends(get_db)):
+def debug_users(db: Session = Depends(get_db)):
     """
     Debug endpoint to check users in database.
     ⚠️ WARNING: This exposes user information. Remove in production!
     """
     try:
-        from app.models.auth import AuthUser, UserRole
-        
         users = db.query(AuthUser).all()
         users_info = []
         for user in users:
@@ -300,15 +537,12 @@ async def debug_users(db: Session = Depends(get_db)):
 
 
 @app.post("/debug/create-admin")
-async def create_admin_endpoint(db: Session = Depends(get_db)):
+def create_admin_endpoint(db: Session = Depends(get_db)):
     """
     Debug endpoint to create admin user if none exists.
     ⚠️ WARNING: This allows creating admin without authentication. Remove in production!
     """
     try:
-        from app.models.auth import AuthUser, UserRole
-        from app.services.auth_service import AuthService
-        
         logger.info("=== CREATE ADMIN ENDPOINT CALLED ===")
         
         # Check if admin exists
@@ -334,8 +568,9 @@ async def create_admin_endpoint(db: Session = Depends(get_db)):
         logger.info(f"Role: admin")
         
         # Use AuthService.create_user() - this method works correctly and avoids bcrypt issues
-        # It uses the already-initialized pwd_context from auth_service.py
-        auth_service = AuthService()
+        # It uses the password hasher configured in auth_service.py; the
+        # shared instance from the auth router is reused
+        auth_service = auth.auth_service
         
         try:
             # Create user using AuthService - this handles password hashing correctly
@@ -392,7 +627,6 @@ async def create_admin_endpoint(db: Session = Depends(get_db)):
             
     except Exception as e:
         logger.error(f"Error creating admin: {e}", exc_info=True)
-        import traceback
         error_trace = traceback.format_exc()
         logger.error(f"Traceback: {error_trace}")
         return {
@@ -442,8 +676,7 @@ async def websocket_recognize(websocket: WebSocket):
     await manager.connect(websocket)
     
     # Generate session ID for this connection
-    import uuid
-    session_id = str(uuid.uuid4())
+    session_id = str(uuid4())
     
     # Check if face recognition is available
     if not FACE_RECOGNITION_AVAILABLE:
@@ -458,10 +691,14 @@ async def websocket_recognize(websocket: WebSocket):
     face_tracking_service.reset()
     
     # Frame rate limiting
-    import time
     last_frame_time = 0
     min_frame_interval = 1.0 / settings.MAX_FRAME_RATE
     
+    # Recognition logs waiting to be written (flushed every
+    # RECOGNITION_LOG_FLUSH_ROWS rows / RECOGNITION_LOG_FLUSH_SECONDS)
+    pending_logs = []
+    last_log_flush = monotonic()
+    
     try:
         # Send connection confirmation
         await manager.send_personal_message({
@@ -475,101 +712,45 @@ async def websocket_recognize(websocket: WebSocket):
             }
         }, websocket)
         
-        # Get database session
-        db_gen = get_db()
-        db = next(db_gen)
-        
         # Keep connection alive and process messages
         while True:
             # Receive message from client
-            data = await websocket.receive_json()
+            raw = await websocket.receive_text()
+            
+            # Frame rate limiting shortcut, before parsing: a dropped frame
+            # shouldn't pay for JSON-decoding its multi-MB base64 payload. Base64
+            # has no quotes, so '"frame"' at either end of the text is the type
+            # value (where the bundled frontend puts it).
+            current_time = monotonic()
+            frame_too_soon = current_time - last_frame_time < min_frame_interval
+            if frame_too_soon and ('"frame"' in raw[:64] or '"frame"' in raw[-64:]):
+                continue  # Skip this frame
+            
+            data = loads_text(raw)
             
             # Handle different message types
             message_type = data.get("type")
             
             if message_type == "frame":
-                # Frame rate limiting
-                current_time = time.time()
-                if current_time - last_frame_time < min_frame_interval:
+                # Authoritative check for frames whose type wasn't at either end
+                if frame_too_soon:
                     continue  # Skip this frame
                 last_frame_time = current_time
                 
                 try:
-                    # Decode base64 image
                     base64_image = data.get("data")
                     if not base64_image:
                         logger.warning("Empty base64 image received in frame")
                         continue
                     
-                    # Decode image with validation and quality checks
-                    try:
-                        image = decode_base64_image(base64_image)
-                    except ValueError as e:
-                        logger.error(f"Failed to decode image: {e}")
-                        continue
-                    
-                    # Validate decoded image
-                    if image is None or image.size == 0:
-                        logger.error("Decoded image is empty or None")
-                        continue
-                    
-                    # Log image properties before processing
-                    height, width = image.shape[:2] if len(image.shape) >= 2 else (0, 0)
-                    logger.debug(f"Processing frame {data.get('frame_id')}: "
-                               f"image={width}x{height}, dtype={image.dtype}, "
-                               f"mean={image.mean():.2f}, std={image.std():.2f}")
-                    
-                    # Enhance image for better detection (CLAHE + adaptive adjustments)
-                    image = enhance_image_for_detection(image)
-                    
-                    # Resize if too large (optimize for speed while preserving detail)
-                    original_size = max(width, height) if width > 0 and height > 0 else 0
-                    image = resize_image(image, max_size=1280)
-                    resized_height, resized_width = image.shape[:2] if len(image.shape) >= 2 else (0, 0)
-                    if original_size != max(resized_width, resized_height):
-                        logger.debug(f"Image resized: {original_size}px → {max(resized_width, resized_height)}px for detection")
-                    
-                    # Detect faces with enhanced upsampling (now set to 2x in face_detection.py)
-                    logger.debug(f"Starting face detection on {resized_width}x{resized_height} enhanced image")
-                    face_locations = face_detection_service.detect_faces(image)
-                    
-                    # Log detection results
-                    if not face_locations:
-                        logger.warning(f"⚠️ No faces detected in frame {data.get('frame_id')} "
-                                     f"(image: {resized_width}x{resized_height}px, "
-                                     f"model: {face_detection_service.model})")
-                        # Send empty result
-                        await manager.send_personal_message({
-                            "type": "recognition_result",
-                            "frame_id": data.get("frame_id"),
-                            "faces": [],
-                            "timestamp": data.get("timestamp"),
-                        }, websocket)
+                    # Decode, detect and embed in the CPU pool so other sockets
+                    # (and ping/pong) aren't blocked behind this frame
+                    processed = await run_cpu(_process_frame, base64_image, data.get("frame_id"))
+                    if processed is None:
                         continue
-                    
-                    logger.info(f"✅ Detected {len(face_locations)} face(s) in frame {data.get('frame_id')}")
-                    
-                    # Filter faces by minimum size (use same as registration: 100px)
-                    # This matches the registration requirement for consistency
-                    valid_faces = []
-                    filtered_count = 0
-                    for idx, face_loc in enumerate(face_locations):
-                        top, right, bottom, left = face_loc
-                        face_width = right - left
-                        face_height = bottom - top
-                        
-                        if check_face_size(face_loc, settings.MIN_FACE_SIZE):
-                            valid_faces.append(face_loc)
-                            logger.debug(f"  Face {idx+1}: {face_width}x{face_height}px - ✅ Valid (>= {settings.MIN_FACE_SIZE}px)")
-                        else:
-                            filtered_count += 1
-                            logger.debug(f"  Face {idx+1}: {face_width}x{face_height}px - ❌ Filtered (< {settings.MIN_FACE_SIZE}px minimum)")
-                    
-                    if filtered_count > 0:
-                        logger.warning(f"Filtered out {filtered_count} face(s) below minimum size ({settings.MIN_FACE_SIZE}px)")
+                    resized_width, resized_height, valid_faces, face_encodings, face_landmarks_list = processed
                     
                     if not valid_faces:
-                        logger.warning(f"⚠️ No valid faces after size filtering in frame {data.get('frame_id')}")
                         await manager.send_personal_message({
                             "type": "recognition_result",
                             "frame_id": data.get("frame_id"),
@@ -578,44 +759,16 @@ async def websocket_recognize(websocket: WebSocket):
                         }, websocket)
                         continue
                     
-                    logger.info(f"✅ {len(valid_faces)} valid face(s) after filtering")
-                    
-                    # Extract face embeddings
-                    face_encodings = face_recognition_service.extract_multiple_embeddings(image, valid_faces)
-                    
-                    if len(face_encodings) != len(valid_faces):
-                        logger.warning(f"Mismatch: {len(valid_faces)} faces but {len(face_encodings)} encodings")
-                        continue
-                    
-                    # Recognize faces with enhanced matching
-                    recognized_users = []
-                    for encoding in face_encodings:
-                        # Use enhanced matching (already improved in find_best_match)
-                        match = face_recognition_service.find_best_match(encoding, db)
-                        if match:
-                            user, confidence = match
-                            # Apply confidence boost for high-quality matches
-                            # This makes recognition sharper and more reliable
-                            if confidence > 0.9:
-                                confidence = min(1.0, confidence * 1.05)  # Small boost for excellent matches
-                            recognized_users.append((user.id, user.name, confidence))
-                        else:
-                            recognized_users.append((None, None, 0.0))
+                    # Recognize faces (database lookups run in the threadpool)
+                    recognized = await run_in_threadpool(_match_faces, face_encodings)
                     
                     # Update tracks
                     tracks = face_tracking_service.update_tracks(
                         valid_faces,
                         face_encodings,
-                        recognized_users
+                        recognized
                     )
                     
-                    # Get landmarks for valid faces
-                    try:
-                        face_landmarks_list = face_recognition.face_landmarks(image, valid_faces)
-                    except Exception as e:
-                        logger.warning(f"Error getting landmarks: {e}")
-                        face_landmarks_list = []
-                    
                     # Build response with enhanced information
                     faces_result = []
                     for idx, track in enumerate(tracks):
@@ -632,13 +785,9 @@ async def websocket_recognize(websocket: WebSocket):
                         else:
                             face_result["confidence"] = 0.0
                         
-                        # Add landmarks if available
+                        # Add landmarks if available (already [x, y] int lists)
                         if idx < len(face_landmarks_list) and face_landmarks_list[idx]:
-                            landmarks = face_landmarks_list[idx]
-                            landmarks_dict = {}
-                            for key, points in landmarks.items():
-                                landmarks_dict[key] = [[int(p[0]), int(p[1])] for p in points]
-                            face_result["landmarks"] = landmarks_dict
+                            face_result["landmarks"] = face_landmarks_list[idx]
                         
                         # Add position status for quality feedback
                         try:
@@ -651,23 +800,23 @@ async def websocket_recognize(websocket: WebSocket):
                             )
                             face_result["position_status"] = position_status
                         except Exception as e:
-                            logger.warning(f"Error calculating position status: {e}")
+                            logger.warning("Error calculating position status: %s", e)
                         
                         faces_result.append(face_result)
                         
-                        # Log recognition event
-                        try:
-                            user_service.create_recognition_log(
-                                db=db,
-                                user_id=track.user_id,
-                                track_id=track.track_id,
-                                confidence=track.confidence,
-                                is_unknown=track.user_id is None,
-                                frame_position=f"{track.bbox[3]},{track.bbox[0]},{track.bbox[1]-track.bbox[3]},{track.bbox[2]-track.bbox[0]}",  # x,y,width,height
-                                session_id=session_id
-                            )
-                        except Exception as e:
-                            logger.error(f"Error creating recognition log: {e}")
+                        # Queue recognition event (written in batches below)
+                        pending_logs.append({
+                            "user_id": track.user_id,
+                            "track_id": track.track_id,
+                            "confidence": track.confidence,
+                            "is_unknown": track.user_id is None,
+                            # Face box as x, y, width, height
+                            "frame_x": int(track.bbox[3]),
+                            "frame_y": int(track.bbox[0]),
+                            "frame_width": int(track.bbox[1] - track.bbox[3]),
+                            "frame_height": int(track.bbox[2] - track.bbox[0]),
+                            "session_id": session_id,
+                        })
                     
                     # Send recognition results
                     await manager.send_personal_message({
@@ -678,8 +827,17 @@ async def websocket_recognize(websocket: WebSocket):
                         "session_id": session_id,
                     }, websocket)
                     
+                    # Flush buffered logs off the event loop once enough piled up
+                    if pending_logs and (
+                        len(pending_logs) >= RECOGNITION_LOG_FLUSH_ROWS
+                        or monotonic() - last_log_flush >= RECOGNITION_LOG_FLUSH_SECONDS
+                    ):
+                        rows, pending_logs = pending_logs, []
+                        last_log_flush = monotonic()
+                        await run_in_threadpool(_flush_recognition_logs, rows)
+                    
                 except Exception as e:
-                    logger.error(f"Error processing frame: {e}", exc_info=True)
+                    _log_exception("Error processing frame", e)
                     await manager.send_personal_message({
                         "type": "error",
                         "message": f"Error processing frame: {str(e)}",
@@ -709,18 +867,16 @@ async def websocket_recognize(websocket: WebSocket):
     
     except WebSocketDisconnect:
         manager.disconnect(websocket)
-        logger.info(f"Client disconnected (session: {session_id})")
+        logger.debug("Client disconnected (session: %s)", session_id)
         face_tracking_service.reset()
     except Exception as e:
-        logger.error(f"WebSocket error: {e}", exc_info=True)
+        _log_exception("WebSocket error", e)
         manager.disconnect(websocket)
         face_tracking_service.reset()
     finally:
-        # Close database session
-        try:
-            db_gen.close()
-        except:
-            pass
+        # Don't lose logs still buffered when the session ends
+        if pending_logs:
+            await run_in_threadpool(_flush_recognition_logs, pending_logs)
 
 
 if __name__ == "__main__":
@@ -730,6 +886,10 @@ if __name__ == "__main__":
         host=settings.HOST,
         port=settings.PORT,
         reload=settings.DEBUG,
-        loop="asyncio",  # Use asyncio instead of uvloop for better compatibility
+        loop="auto",  # uvloop when installed (not on Windows), else asyncio
+        http="auto",  # httptools when installed
+        ws_ping_interval=settings.WS_PING_INTERVAL,
+        ws_ping_timeout=settings.WS_PING_TIMEOUT,
+        ws_max_size=16 * 1024 * 1024,  # Base64 frames can be several MB
     )
 
@@ -3,26 +3,30 @@ FaceEmbedding model - stores face embeddings (128-dim vectors) for each user.
 A user can have multiple embeddings captured from different angles.
 """
 
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, ARRAY, Float
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, LargeBinary, Float
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
-from typing import List
+from typing import List, Union
+import numpy as np
 
 from app.database import Base
 
+# On-disk embedding format: packed little-endian float32 (128 x 4 = 512 bytes)
+EMBEDDING_DTYPE = np.dtype("<f4")
+
 
 class FaceEmbedding(Base):
     """
     Face embedding model storing 128-dimensional face vectors.
     
     Each user can have multiple embeddings (from different angles/lighting).
-    The embedding is a 128-element float array representing the face's
-    unique characteristics.
+    The embedding is a 128-element float vector representing the face's
+    unique characteristics, stored as packed float32 bytes (see `vector`).
     
     Attributes:
         id: Primary key
         user_id: Foreign key to User
-        embedding: 128-dimensional float array (face encoding)
+        embedding: 128-dimensional float32 face encoding, packed as bytes
         capture_angle: Angle description (e.g., "frontal", "left", "right")
         quality_score: Quality score of the captured face (0-1)
         created_at: Timestamp when embedding was created
@@ -34,9 +38,9 @@ class FaceEmbedding(Base):
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
     
-    # Store embedding as ARRAY of floats (128 dimensions)
-    # PostgreSQL ARRAY type for efficient storage and querying
-    embedding = Column(ARRAY(Float), nullable=False)
+    # Store embedding as packed float32 bytes (BYTEA): 512 bytes per row instead
+    # of a float8[] with per-element boxing on read; decoded with np.frombuffer
+    embedding = Column(LargeBinary, nullable=False)
     
     capture_angle = Column(String(50), nullable=True)  # "frontal", "left", "right", etc.
     quality_score = Column(Float, nullable=True)  # 0.0 to 1.0
@@ -54,28 +58,48 @@ class FaceEmbedding(Base):
         return {
             "id": self.id,
             "user_id": self.user_id,
-            "embedding_length": len(self.embedding) if self.embedding else 0,
+            "embedding_length": len(self.embedding) // EMBEDDING_DTYPE.itemsize if self.embedding else 0,
             "capture_angle": self.capture_angle,
             "quality_score": self.quality_score,
             "created_at": self.created_at.isoformat() if self.created_at else None,
         }
     
+    @staticmethod
+    def pack_embedding(embedding: Union[List[float], np.ndarray]) -> bytes:
+        """
+        Convert an embedding to the stored byte format.
+        
+        Args:
+            embedding: List or numpy array of floats
+            
+        Returns:
+            Packed float32 bytes
+        """
+        return np.asarray(embedding, dtype=EMBEDDING_DTYPE).tobytes()
+    
+    @property
+    def vector(self) -> np.ndarray:
+        """Embedding as a (read-only) float32 numpy array."""
+        return np.frombuffer(self.embedding, dtype=EMBEDDING_DTYPE)
+    
     @classmethod
-    def validate_embedding(cls, embedding: List[float]) -> bool:
+    def validate_embedding(cls, embedding: Union[List[float], np.ndarray]) -> bool:
         """
-        Validate that embedding is correct format (128 dimensions).
+        Validate that embedding is correct format (128 finite numbers).
         
         Args:
-            embedding: List of floats representing face embedding
+            embedding: List or numpy array of floats representing face embedding
             
         Returns:
             True if valid, False otherwise
         """
-        if not embedding:
+        if embedding is None:
             return False
-        if len(embedding) != 128:
-            return False
-        if not all(isinstance(x, (int, float)) for x in embedding):
+        
+        # One C-level conversion instead of 128 isinstance() checks;
+        # non-numeric elements make the cast fail
+        try:
+            arr = np.asarray(embedding, dtype=np.float32)
+        except (TypeError, ValueError):
             return False
-        return True
-
+        return arr.shape == (128,) and bool(np.isfinite(arr).all())
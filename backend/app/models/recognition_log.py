@@ -2,9 +2,11 @@
 RecognitionLog model - stores recognition events for analytics and auditing.
 """
 
-from sqlalchemy import Column, Integer, String, DateTime, Float, ForeignKey, Boolean
+from sqlalchemy import Column, Integer, SmallInteger, String, DateTime, Float, ForeignKey, Boolean, Index, case
+from sqlalchemy.ext.hybrid import hybrid_property
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
+from typing import Optional
 
 from app.database import Base
 
@@ -22,7 +24,8 @@ class RecognitionLog(Base):
         track_id: Track ID assigned during recognition session
         confidence: Confidence score (0.0 to 1.0)
         is_unknown: Whether this was an unknown/unregistered person
-        frame_position: Position of face in frame (x, y, width, height)
+        frame_x, frame_y, frame_width, frame_height: Face box in the frame (pixels)
+        frame_position: "x,y,width,height" string built from the box columns
         session_id: Identifier for the recognition session
         created_at: Timestamp when recognition occurred
         user: Relationship to User model (if identified)
@@ -31,33 +34,81 @@ class RecognitionLog(Base):
     __tablename__ = "recognition_logs"
     
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
-    user_id = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True, index=True)
+    # Indexed via (user_id, created_at DESC) in __table_args__
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
     
     track_id = Column(String(50), nullable=True, index=True)  # Track ID from face tracking
     confidence = Column(Float, nullable=False)  # 0.0 to 1.0
-    is_unknown = Column(Boolean, default=False, nullable=False, index=True)
+    is_unknown = Column(Boolean, default=False, nullable=False)
     
-    # Frame position (stored as JSON string: "x,y,width,height")
-    frame_position = Column(String(100), nullable=True)
+    # Face position in the frame as integer columns (x, y, width, height)
+    frame_x = Column(SmallInteger, nullable=True)
+    frame_y = Column(SmallInteger, nullable=True)
+    frame_width = Column(SmallInteger, nullable=True)
+    frame_height = Column(SmallInteger, nullable=True)
     
     # Session identifier (can be used to group recognitions from same session)
-    session_id = Column(String(100), nullable=True, index=True)
+    session_id = Column(String(100), nullable=True)
     
-    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False, index=True)
+    # created_at, is_unknown and session_id are indexed via the composites /
+    # BRIN in __table_args__ (a composite also serves lookups on its prefix)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     
     # Relationship
     user = relationship("User", back_populates="recognition_logs")
     
+    __table_args__ = (
+        # Serves keyset pagination: ORDER BY created_at DESC, id DESC
+        Index("ix_recognition_logs_created_at_id", "created_at", "id"),
+        # Dashboard feeds: WHERE is_unknown = ? / session_id = ? / user_id = ?
+        # [AND created_at range] ORDER BY created_at DESC LIMIT N
+        Index("ix_recognition_logs_unknown_created_at", "is_unknown", created_at.desc()),
+        Index("ix_recognition_logs_user_created_at", "user_id", created_at.desc()),
+        Index("ix_recognition_logs_session_created_at", "session_id", created_at.desc()),
+        # Tiny block-range index for time-range analytics over the append-only table
+        Index(
+            "ix_recognition_logs_created_at_brin",
+            "created_at",
+            postgresql_using="brin",
+            postgresql_with={"pages_per_range": 32},
+        ).ddl_if(dialect="postgresql"),
+        # Serves /api/search/unknown-group: GROUP BY track_id over unknown rows only
+        Index(
+            "ix_recognition_logs_unknown_track_id",
+            "track_id",
+            postgresql_where=is_unknown.is_(True),
+        ),
+    )
+    
     def __repr__(self) -> str:
         user_info = f"user_id={self.user_id}" if self.user_id else "unknown"
         return f"<RecognitionLog(id={self.id}, {user_info}, confidence={self.confidence:.2f})>"
     
+    @hybrid_property
+    def frame_position(self) -> Optional[str]:
+        """Face position as "x,y,width,height" (the API format), None if unknown."""
+        if self.frame_x is None:
+            return None
+        return f"{self.frame_x},{self.frame_y},{self.frame_width},{self.frame_height}"
+    
+    @frame_position.expression
+    def frame_position(cls):
+        return case(
+            (cls.frame_x.is_(None), None),
+            else_=func.concat_ws(",", cls.frame_x, cls.frame_y, cls.frame_width, cls.frame_height),
+        )
+    
+    @property
+    def user_name(self):
+        """Name of the recognized user (None if unknown)."""
+        return self.user.name if self.user else None
+    
     def to_dict(self) -> dict:
         """Convert log entry to dictionary representation."""
         return {
             "id": self.id,
             "user_id": self.user_id,
-            "user_name": self.user.name if self.user else None,
+            "user_name": self.user_name,
             "track_id": self.track_id,
             "confidence": round(self.confidence, 4),
             "is_unknown": self.is_unknown,
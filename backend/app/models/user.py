@@ -2,12 +2,13 @@
 User model - stores registered users in the system.
 """
 
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, Text
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, Text, select
+from sqlalchemy.orm import relationship, column_property
 from sqlalchemy.sql import func
 from datetime import datetime
 
 from app.database import Base
+from app.models.face_embedding import FaceEmbedding
 
 
 class User(Base):
@@ -23,12 +24,17 @@ class User(Base):
         is_active: Whether the user is active in the system
         created_at: Timestamp when user was registered
         updated_at: Timestamp when user was last updated
+        face_count: Number of face embeddings (deferred SQL count; undefer when listing)
         face_embeddings: Relationship to FaceEmbedding records
         recognition_logs: Relationship to RecognitionLog records
     """
     
     __tablename__ = "users"
     
+    # Fetch server-generated timestamps in the INSERT itself (RETURNING on
+    # PostgreSQL) so new users don't need a refresh before serialization
+    __mapper_args__ = {"eager_defaults": True}
+    
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     name = Column(String(255), nullable=False, index=True)
     email = Column(String(255), nullable=True, index=True)
@@ -38,6 +44,16 @@ class User(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
     
+    # Correlated COUNT(*) subquery; deferred so it is only computed when a
+    # query asks for it with undefer(User.face_count)
+    face_count = column_property(
+        select(func.count(FaceEmbedding.id))
+        .where(FaceEmbedding.user_id == id)
+        .correlate_except(FaceEmbedding)
+        .scalar_subquery(),
+        deferred=True
+    )
+    
     # Relationships
     face_embeddings = relationship(
         "FaceEmbedding",
@@ -55,6 +71,13 @@ class User(Base):
     
     def to_dict(self) -> dict:
         """Convert user to dictionary representation."""
+        # Count the collection if it is already in memory (new users, or loaded
+        # with selectinload), otherwise use the SQL count column
+        if "face_embeddings" in self.__dict__:
+            face_count = len(self.face_embeddings)
+        else:
+            face_count = self.face_count or 0
+        
         return {
             "id": self.id,
             "name": self.name,
@@ -63,6 +86,6 @@ class User(Base):
             "is_active": self.is_active,
             "created_at": self.created_at.isoformat() if self.created_at else None,
             "updated_at": self.updated_at.isoformat() if self.updated_at else None,
-            "face_count": len(self.face_embeddings) if self.face_embeddings else 0,
+            "face_count": face_count,
         }
 
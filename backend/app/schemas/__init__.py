@@ -4,7 +4,7 @@ Pydantic schemas for request/response validation.
 
 from app.schemas.user import UserCreate, UserResponse, UserUpdate, UserRegisterRequest
 from app.schemas.face_embedding import FaceEmbeddingCreate, FaceEmbeddingResponse
-from app.schemas.recognition_log import RecognitionLogResponse, RecognitionLogFilter
+from app.schemas.recognition_log import RecognitionLogResponse, RecognitionLogPage, RecognitionLogFilter
 
 __all__ = [
     "UserCreate",
@@ -14,6 +14,7 @@ __all__ = [
     "FaceEmbeddingCreate",
     "FaceEmbeddingResponse",
     "RecognitionLogResponse",
+    "RecognitionLogPage",
     "RecognitionLogFilter",
 ]
 
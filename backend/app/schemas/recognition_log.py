@@ -2,13 +2,15 @@
 Pydantic schemas for RecognitionLog model.
 """
 
-from pydantic import BaseModel, Field
-from typing import Optional
+from pydantic import BaseModel, ConfigDict, Field, field_serializer
+from typing import List, Optional
 from datetime import datetime
 
 
 class RecognitionLogResponse(BaseModel):
     """Schema for recognition log response."""
+    model_config = ConfigDict(from_attributes=True)
+    
     id: int
     user_id: Optional[int]
     user_name: Optional[str] = Field(None, description="Name of recognized user")
@@ -19,8 +21,15 @@ class RecognitionLogResponse(BaseModel):
     session_id: Optional[str]
     created_at: datetime
     
-    class Config:
-        from_attributes = True
+    @field_serializer("confidence")
+    def _round_confidence(self, confidence: float) -> float:
+        return round(confidence, 4)
+
+
+class RecognitionLogPage(BaseModel):
+    """Schema for a page of recognition logs (keyset pagination)."""
+    items: List[RecognitionLogResponse]
+    next_cursor: Optional[str] = Field(None, description="Cursor for the next page (None on the last page)")
 
 
 class RecognitionLogFilter(BaseModel):
@@ -32,5 +41,6 @@ class RecognitionLogFilter(BaseModel):
     end_date: Optional[datetime] = None
     min_confidence: Optional[float] = Field(None, ge=0.0, le=1.0)
     limit: int = Field(100, ge=1, le=1000)
+    cursor: Optional[str] = None
     offset: int = Field(0, ge=0)
 
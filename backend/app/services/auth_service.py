@@ -2,26 +2,75 @@
 Authentication service for JWT tokens and password management.
 """
 
-from datetime import datetime, timedelta
+from dataclasses import dataclass
+from datetime import timedelta
 from typing import Optional
-from jose import JWTError, jwt
-from passlib.context import CryptContext
+import secrets
+import threading
+import time
+from jose import JWTError, jws, jwt
+from sqlalchemy import bindparam, func, select, update
 from sqlalchemy.orm import Session
 import logging
 
 from app.config import settings
+from app.database import SessionManager
 from app.models.auth import AuthUser, UserRole
+from app.services.cache_service import CacheService
 
 logger = logging.getLogger(__name__)
 
-# Password hashing context
-# Use bcrypt directly to avoid passlib initialization issues
-# The passlib CryptContext can have issues with bcrypt backend initialization
-# Using bcrypt directly is more reliable
+# Password hashing
+# New hashes use argon2id (libargon2, C) when argon2-cffi is installed and
+# PASSWORD_SCHEME is "argon2", otherwise bcrypt. Both are called directly
+# (no passlib CryptContext). bcrypt stays available to verify legacy hashes;
+# they are upgraded on the next login.
 import bcrypt
-USE_BCRYPT_DIRECTLY = True
-pwd_context = None
-logger.info("Using bcrypt directly for password hashing (bypassing passlib)")
+
+try:
+    from argon2 import PasswordHasher
+    from argon2.exceptions import InvalidHashError, VerificationError
+    ARGON2_AVAILABLE = True
+    password_hasher = PasswordHasher(time_cost=2, memory_cost=64_000, parallelism=2)
+    logger.info("Using argon2id for password hashing (bcrypt for legacy hashes)")
+except ImportError:
+    ARGON2_AVAILABLE = False
+    password_hasher = None
+    logger.info("argon2-cffi not installed, using bcrypt for password hashing")
+
+# Optional orjson import (faster claim serialization when signing tokens)
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    orjson = None
+    ORJSON_AVAILABLE = False
+
+# Built once: hot auth lookups reuse the same statement object, so SQLAlchemy's
+# compiled cache hits without rebuilding a Query per call
+_AUTH_USER_BY_USERNAME = select(AuthUser).where(AuthUser.username == bindparam("username"))
+# Login accepts the username in any case
+_AUTH_USER_BY_LOGIN = select(AuthUser).where(AuthUser.username.ilike(bindparam("username")))
+
+
+@dataclass(frozen=True)
+class AuthUserSnapshot:
+    """Detached, read-only view of an AuthUser row used by request dependencies."""
+    id: int
+    username: str
+    email: Optional[str]
+    role: UserRole
+    is_active: bool
+    
+    @classmethod
+    def from_user(cls, user: AuthUser) -> "AuthUserSnapshot":
+        return cls(
+            id=user.id,
+            username=user.username,
+            email=user.email,
+            role=user.role,
+            is_active=user.is_active
+        )
 
 
 class AuthService:
@@ -32,52 +81,77 @@ class AuthService:
         self.secret_key = settings.SECRET_KEY
         self.algorithm = settings.ALGORITHM
         self.access_token_expire_minutes = settings.ACCESS_TOKEN_EXPIRE_MINUTES
+        # Precomputed default token lifetime
+        self.access_token_ttl_seconds = settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
+        # Scheme for new hashes, resolved once
+        self.use_argon2 = ARGON2_AVAILABLE and settings.PASSWORD_SCHEME.lower() == "argon2"
+        self.bcrypt_rounds = settings.BCRYPT_ROUNDS
+        # User IDs whose last_login still has to be written (see flush_last_logins)
+        self._pending_logins = set()
+        self._pending_logins_lock = threading.Lock()
+        # Shared (Redis) revocation markers; disabled without Redis
+        self.cache_service = CacheService()
     
     def verify_password(self, plain_password: str, hashed_password: str) -> bool:
-        """Verify a password against its hash."""
-        if USE_BCRYPT_DIRECTLY:
-            import bcrypt
-            try:
-                # bcrypt expects bytes
-                return bcrypt.checkpw(
-                    plain_password.encode('utf-8'),
-                    hashed_password.encode('utf-8')
-                )
-            except Exception as e:
-                logger.error(f"Bcrypt verification error: {e}")
-                return False
-        else:
-            # Use passlib
-            if pwd_context is None:
-                logger.error("Password context not initialized")
+        """Verify a password against its hash (argon2id or legacy bcrypt)."""
+        if hashed_password.startswith("$argon2"):
+            if not ARGON2_AVAILABLE:
+                logger.error("argon2 hash found but argon2-cffi is not installed")
                 return False
             try:
-                return pwd_context.verify(plain_password, hashed_password)
-            except Exception as e:
-                logger.error(f"Password verification error: {e}")
+                return password_hasher.verify(hashed_password, plain_password)
+            except (VerificationError, InvalidHashError):
                 return False
+        
+        try:
+            # bcrypt expects bytes
+            return bcrypt.checkpw(
+                plain_password.encode('utf-8'),
+                hashed_password.encode('utf-8')
+            )
+        except Exception as e:
+            logger.error(f"Bcrypt verification error: {e}")
+            return False
     
     def get_password_hash(self, password: str) -> str:
         """Hash a password."""
-        if USE_BCRYPT_DIRECTLY:
-            import bcrypt
-            try:
-                # bcrypt expects bytes and returns bytes
-                hashed = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds=12))
-                return hashed.decode('utf-8')
-            except Exception as e:
-                logger.error(f"Bcrypt hashing error: {e}")
-                raise
-        else:
-            # Use passlib
-            if pwd_context is None:
-                logger.error("Password context not initialized")
-                raise ValueError("Password context not initialized")
-            try:
-                return pwd_context.hash(password)
-            except Exception as e:
-                logger.error(f"Password hashing error: {e}")
-                raise
+        if self.use_argon2:
+            return password_hasher.hash(password)
+        
+        try:
+            # bcrypt expects bytes and returns bytes
+            hashed = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds=self.bcrypt_rounds))
+            return hashed.decode('utf-8')
+        except Exception as e:
+            logger.error(f"Bcrypt hashing error: {e}")
+            raise
+    
+    def password_needs_rehash(self, hashed_password: str) -> bool:
+        """Whether a stored hash should be replaced (legacy bcrypt or outdated argon2 params)."""
+        if not self.use_argon2:
+            return False
+        if not hashed_password.startswith("$argon2"):
+            return True
+        try:
+            return password_hasher.check_needs_rehash(hashed_password)
+        except InvalidHashError:
+            return True
+    
+    def upgrade_password_hash(self, db: Session, user: AuthUser, password: str) -> None:
+        """
+        Re-hash a verified password if its stored hash is outdated.
+        Must only be called after verify_password succeeded.
+        """
+        if not self.password_needs_rehash(user.hashed_password):
+            return
+        
+        try:
+            user.hashed_password = self.get_password_hash(password)
+            db.commit()
+            logger.info(f"Upgraded password hash for user: {user.username}")
+        except Exception as e:
+            db.rollback()
+            logger.warning(f"Failed to upgrade password hash for {user.username}: {e}")
     
     def create_access_token(self, data: dict, expires_delta: Optional[timedelta] = None) -> str:
         """
@@ -92,13 +166,20 @@ class AuthService:
         """
         to_encode = data.copy()
         
-        if expires_delta:
-            expire = datetime.utcnow() + expires_delta
-        else:
-            expire = datetime.utcnow() + timedelta(minutes=self.access_token_expire_minutes)
+        # Integer epoch arithmetic (what `exp` is encoded as anyway)
+        ttl_seconds = int(expires_delta.total_seconds()) if expires_delta else self.access_token_ttl_seconds
+        
+        # jti lets a single token be revoked without a per-request user lookup
+        to_encode.update({
+            "exp": int(time.time()) + ttl_seconds,
+            "jti": secrets.token_urlsafe(16)
+        })
         
-        to_encode.update({"exp": expire})
-        encoded_jwt = jwt.encode(to_encode, self.secret_key, algorithm=self.algorithm)
+        if ORJSON_AVAILABLE:
+            # Claims are plain JSON types, so serialize once with orjson and sign the bytes
+            encoded_jwt = jws.sign(orjson.dumps(to_encode), self.secret_key, algorithm=self.algorithm)
+        else:
+            encoded_jwt = jwt.encode(to_encode, self.secret_key, algorithm=self.algorithm)
         
         return encoded_jwt
     
@@ -123,31 +204,76 @@ class AuthService:
         """
         Authenticate a user by username and password.
         
+        The last_login update is only queued; callers schedule
+        flush_last_logins() once the response is on its way.
+        
         Args:
             db: Database session
-            username: Username
+            username: Username (matched case-insensitively)
             password: Plain text password
             
         Returns:
             AuthUser if authenticated, None otherwise
         """
-        user = db.query(AuthUser).filter(AuthUser.username == username).first()
+        # Case-insensitive username lookup (same rule as the /login form)
+        user = db.execute(_AUTH_USER_BY_LOGIN, {"username": username.strip()}).scalars().first()
         
         if not user:
+            logger.warning(f"User not found: '{username}'")
             return None
         
         if not user.is_active:
+            logger.warning(f"User '{user.username}' is not active")
             return None
         
         if not self.verify_password(password, user.hashed_password):
+            logger.warning(f"Password verification failed for user: '{user.username}'")
             return None
         
-        # Update last login
-        user.last_login = datetime.utcnow()
-        db.commit()
+        # Migrate legacy bcrypt hashes to argon2id now that we know the password
+        self.upgrade_password_hash(db, user, password)
+        
+        # last_login is written after the response (flush_last_logins), so
+        # the login path stays a single SELECT
+        self.record_login(user.id)
         
         return user
     
+    def record_login(self, user_id: int) -> None:
+        """Queue a last_login update for a successfully authenticated user."""
+        with self._pending_logins_lock:
+            self._pending_logins.add(user_id)
+    
+    def flush_last_logins(self) -> int:
+        """
+        Write all queued last_login updates with one UPDATE (run as a background task).
+        
+        Logins that arrive while a flush is running are picked up by the next
+        one, so concurrent logins share a single statement.
+        
+        Returns:
+            Number of users updated
+        """
+        with self._pending_logins_lock:
+            user_ids, self._pending_logins = self._pending_logins, set()
+        if not user_ids:
+            return 0
+        
+        try:
+            with SessionManager() as db:
+                db.execute(
+                    update(AuthUser)
+                    .where(AuthUser.id.in_(user_ids))
+                    .values(last_login=func.now())
+                    .execution_options(synchronize_session=False)
+                )
+                db.commit()
+        except Exception as e:
+            logger.warning(f"Failed to record last login for {len(user_ids)} user(s): {e}")
+            return 0
+        
+        return len(user_ids)
+    
     def create_user(self, db: Session, username: str, password: str, 
                    email: Optional[str] = None, role: UserRole = UserRole.OPERATOR) -> AuthUser:
         """
@@ -181,9 +307,43 @@ class AuthService:
     
     def get_user_by_username(self, db: Session, username: str) -> Optional[AuthUser]:
         """Get user by username."""
-        return db.query(AuthUser).filter(AuthUser.username == username).first()
+        return db.execute(_AUTH_USER_BY_USERNAME, {"username": username}).scalars().first()
+    
+    def update_user(self, db: Session, user: AuthUser, role: Optional[UserRole] = None,
+                    is_active: Optional[bool] = None) -> AuthUser:
+        """
+        Change a user's role and/or active flag.
+        
+        Tokens are authorized from their claims, so a deactivation or role
+        change also marks the user's existing tokens: until they expire they
+        are checked against the database instead.
+        
+        Args:
+            db: Database session
+            user: AuthUser to update
+            role: New role (unchanged if None)
+            is_active: New active flag (unchanged if None)
+            
+        Returns:
+            Updated AuthUser
+        """
+        revoke = False
+        if role is not None and role != user.role:
+            user.role = role
+            revoke = True
+        if is_active is not None and is_active != user.is_active:
+            user.is_active = is_active
+            revoke = True
+        
+        db.commit()
+        
+        if revoke:
+            if not self.cache_service.revoke_user_tokens(user.id, ttl=self.access_token_ttl_seconds):
+                logger.info(f"Token revocation unavailable; tokens of '{user.username}' are checked against the database")
+            logger.info(f"Updated auth user: {user.username} (role: {user.role.value}, active: {user.is_active})")
+        return user
     
-    def has_permission(self, user: AuthUser, required_role: UserRole) -> bool:
+    def has_permission(self, user: AuthUserSnapshot, required_role: UserRole) -> bool:
         """
         Check if user has required permission.
         
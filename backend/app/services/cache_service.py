@@ -4,7 +4,7 @@ Redis caching service for face embeddings and other data.
 
 import json
 import numpy as np
-from typing import Optional, List
+from typing import Optional, Tuple
 import logging
 from app.config import settings
 
@@ -18,7 +18,6 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
-
 class CacheService:
     """Service for Redis caching operations."""
     
@@ -49,69 +48,72 @@ class CacheService:
         else:
             logger.info("Redis caching disabled (REDIS_ENABLED=False or no REDIS_URL)")
     
-    def _encode_embedding(self, embedding: np.ndarray) -> bytes:
-        """Encode numpy array to bytes for Redis storage."""
-        return embedding.tobytes()
+    # Shared embedding matrix: the packed rows plus a generation counter that
+    # every worker bumps on user/embedding CRUD
+    def _embedding_matrix_key(self, dim: int) -> str:
+        return f"face:emb:{dim}:snapshot"
     
-    def _decode_embedding(self, data: bytes) -> np.ndarray:
-        """Decode bytes from Redis to numpy array."""
-        return np.frombuffer(data, dtype=np.float64)
+    def _embedding_generation_key(self, dim: int) -> str:
+        return f"face:emb:{dim}:generation"
     
-    def cache_face_embedding(self, user_id: int, embedding_id: int, embedding: np.ndarray) -> bool:
+    def get_embedding_generation(self, dim: int) -> Optional[int]:
         """
-        Cache a face embedding.
+        Get the shared generation of the embedding gallery.
         
         Args:
-            user_id: User ID
-            embedding_id: Embedding ID
-            embedding: Face embedding (128-dim numpy array)
+            dim: Embedding size
             
         Returns:
-            True if cached successfully, False otherwise
+            Current generation (0 if never bumped), or None if Redis is unavailable
         """
         if not self.enabled:
-            return False
+            return None
         
         try:
-            key = f"face_embedding:{user_id}:{embedding_id}"
-            value = self._encode_embedding(embedding)
-            self.client.setex(key, self.ttl, value)
-            return True
+            value = self.client.get(self._embedding_generation_key(dim))
+            return int(value) if value is not None else 0
         except Exception as e:
-            logger.error(f"Error caching embedding: {e}")
-            return False
+            logger.error(f"Error getting embedding generation: {e}")
+            return None
     
-    def get_face_embedding(self, user_id: int, embedding_id: int) -> Optional[np.ndarray]:
+    def bump_embedding_generation(self, dim: int) -> Optional[int]:
         """
-        Get cached face embedding.
+        Mark every worker's embedding matrix stale (call after user/embedding CRUD).
+        
+        Increments the shared generation and drops the published matrix in one
+        round trip.
         
         Args:
-            user_id: User ID
-            embedding_id: Embedding ID
+            dim: Embedding size
             
         Returns:
-            Cached embedding or None if not found
+            New generation, or None if Redis is unavailable
         """
         if not self.enabled:
             return None
         
         try:
-            key = f"face_embedding:{user_id}:{embedding_id}"
-            data = self.client.get(key)
-            if data:
-                return self._decode_embedding(data)
-            return None
+            pipe = self.client.pipeline()
+            pipe.incr(self._embedding_generation_key(dim))
+            pipe.delete(self._embedding_matrix_key(dim))
+            generation, _ = pipe.execute()
+            return int(generation)
         except Exception as e:
-            logger.error(f"Error getting cached embedding: {e}")
+            logger.error(f"Error bumping embedding generation: {e}")
             return None
     
-    def cache_user_embeddings(self, user_id: int, embeddings: List[tuple]) -> bool:
+    def cache_embedding_matrix(self, generation: int, embedding_ids: np.ndarray, user_ids: np.ndarray,
+                               matrix: np.ndarray, ttl: Optional[int] = None) -> bool:
         """
-        Cache all embeddings for a user.
+        Cache the packed matrix of all active embeddings so other workers can
+        rebuild their in-process index without querying Postgres.
         
         Args:
-            user_id: User ID
-            embeddings: List of (embedding_id, embedding) tuples
+            generation: Gallery generation read before the rows were loaded
+            embedding_ids: (N,) FaceEmbedding IDs
+            user_ids: (N,) owning User IDs
+            matrix: (N, D) float32 embeddings
+            ttl: Time to live in seconds (default: CACHE_TTL)
             
         Returns:
             True if cached successfully
@@ -120,58 +122,62 @@ class CacheService:
             return False
         
         try:
-            for embedding_id, embedding in embeddings:
-                self.cache_face_embedding(user_id, embedding_id, embedding)
-            
-            # Also cache list of embedding IDs
-            embedding_ids = [str(eid) for eid, _ in embeddings]
-            list_key = f"user_embeddings:{user_id}"
-            self.client.setex(list_key, self.ttl, json.dumps(embedding_ids))
+            # Keys are partitioned by embedding size so a model change never
+            # decodes rows of the wrong width. The generation is stored with
+            # the rows: a copy published after a concurrent bump is ignored.
+            value = (
+                np.int64(generation).tobytes()
+                + np.ascontiguousarray(embedding_ids, dtype=np.int64).tobytes()
+                + np.ascontiguousarray(user_ids, dtype=np.int64).tobytes()
+                + np.ascontiguousarray(matrix, dtype=np.float32).tobytes()
+            )
+            self.client.setex(self._embedding_matrix_key(matrix.shape[1]), ttl or self.ttl, value)
             return True
         except Exception as e:
-            logger.error(f"Error caching user embeddings: {e}")
+            logger.error(f"Error caching embedding matrix: {e}")
             return False
     
-    def invalidate_user_embeddings(self, user_id: int) -> bool:
+    def get_embedding_matrix(self, dim: int, generation: int) -> Optional[tuple]:
         """
-        Invalidate all cached embeddings for a user.
+        Get the cached matrix of active embeddings for a generation.
         
         Args:
-            user_id: User ID
+            dim: Embedding size
+            generation: Current gallery generation
             
         Returns:
-            True if invalidated successfully
+            (embedding_ids, user_ids, matrix) tuple, or None if not cached or
+            published for another generation
         """
         if not self.enabled:
-            return False
+            return None
         
         try:
-            # Get list of embedding IDs
-            list_key = f"user_embeddings:{user_id}"
-            ids_json = self.client.get(list_key)
-            
-            if ids_json:
-                embedding_ids = json.loads(ids_json)
-                # Delete individual embeddings
-                for eid in embedding_ids:
-                    key = f"face_embedding:{user_id}:{eid}"
-                    self.client.delete(key)
+            data = self.client.get(self._embedding_matrix_key(dim))
+            if data is None or int(np.frombuffer(data, dtype=np.int64, count=1)[0]) != generation:
+                return None
             
-            # Delete list
-            self.client.delete(list_key)
-            return True
+            # Layout: int64 generation, then per row int64 embedding id +
+            # int64 user id + dim float32 values (each as one column block)
+            count = (len(data) - 8) // (16 + 4 * dim)
+            embedding_ids = np.frombuffer(data, dtype=np.int64, count=count, offset=8)
+            user_ids = np.frombuffer(data, dtype=np.int64, count=count, offset=8 + 8 * count)
+            matrix = np.frombuffer(
+                data, dtype=np.float32, count=count * dim, offset=8 + 16 * count
+            ).reshape(count, dim)
+            return embedding_ids, user_ids, matrix
         except Exception as e:
-            logger.error(f"Error invalidating user embeddings: {e}")
-            return False
+            logger.error(f"Error getting cached embedding matrix: {e}")
+            return None
     
-    def cache_recognition_result(self, embedding_hash: str, result: dict, ttl: int = 300) -> bool:
+    def cache_json(self, key: str, value, ttl: Optional[int] = None) -> bool:
         """
-        Cache recognition result for an embedding.
+        Cache an arbitrary JSON-serializable value.
         
         Args:
-            embedding_hash: Hash of the embedding
-            result: Recognition result dict
-            ttl: Time to live in seconds (default: 5 minutes)
+            key: Cache key
+            value: JSON-serializable value
+            ttl: Time to live in seconds (default: CACHE_TTL)
             
         Returns:
             True if cached successfully
@@ -180,35 +186,99 @@ class CacheService:
             return False
         
         try:
-            key = f"recognition:{embedding_hash}"
-            value = json.dumps(result)
-            self.client.setex(key, ttl, value)
+            self.client.setex(key, ttl or self.ttl, json.dumps(value))
             return True
         except Exception as e:
-            logger.error(f"Error caching recognition result: {e}")
+            logger.error(f"Error caching {key}: {e}")
             return False
     
-    def get_recognition_result(self, embedding_hash: str) -> Optional[dict]:
+    def get_json(self, key: str):
         """
-        Get cached recognition result.
+        Get a cached JSON value.
         
         Args:
-            embedding_hash: Hash of the embedding
+            key: Cache key
             
         Returns:
-            Cached result or None
+            Cached value or None
         """
         if not self.enabled:
             return None
         
         try:
-            key = f"recognition:{embedding_hash}"
             data = self.client.get(key)
             if data:
                 return json.loads(data)
             return None
         except Exception as e:
-            logger.error(f"Error getting cached recognition result: {e}")
+            logger.error(f"Error getting cached {key}: {e}")
+            return None
+    
+    def revoke_token(self, jti: str, ttl: int) -> bool:
+        """
+        Add a token ID to the revocation list until the token would expire anyway.
+        
+        Args:
+            jti: JWT ID claim of the token
+            ttl: Seconds until the token expires
+            
+        Returns:
+            True if recorded, False otherwise
+        """
+        if not self.enabled:
+            return False
+        
+        try:
+            self.client.setex(f"revoked_jti:{jti}", max(1, int(ttl)), b"1")
+            return True
+        except Exception as e:
+            logger.error(f"Error revoking token {jti}: {e}")
+            return False
+    
+    def revoke_user_tokens(self, user_id: int, ttl: int) -> bool:
+        """
+        Stop trusting the claims of a user's outstanding tokens (call after the
+        user is deactivated or their role changes).
+        
+        While the marker lives, their tokens are validated against the database
+        instead of the token claims; it outlives every token issued before it.
+        
+        Args:
+            user_id: AuthUser ID
+            ttl: Seconds until the user's newest existing token expires
+            
+        Returns:
+            True if recorded, False otherwise
+        """
+        if not self.enabled:
+            return False
+        
+        try:
+            self.client.setex(f"revoked_user:{user_id}", max(1, int(ttl)), b"1")
+            return True
+        except Exception as e:
+            logger.error(f"Error revoking tokens of user {user_id}: {e}")
+            return False
+    
+    def get_token_revocation(self, jti: str, user_id: int) -> Optional[Tuple[bool, bool]]:
+        """
+        Check a token ID and its user against the revocation markers (one round trip).
+        
+        Args:
+            jti: JWT ID claim of the token
+            user_id: AuthUser ID from the token claims
+            
+        Returns:
+            (token_revoked, user_changed), or None if the revocation list is unavailable
+        """
+        if not self.enabled:
+            return None
+        
+        try:
+            token_marker, user_marker = self.client.mget(f"revoked_jti:{jti}", f"revoked_user:{user_id}")
+            return token_marker is not None, user_marker is not None
+        except Exception as e:
+            logger.error(f"Error checking token revocation for {jti}: {e}")
             return None
     
     def clear_cache(self) -> bool:
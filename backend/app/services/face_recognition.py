@@ -10,10 +10,10 @@ import logging
 
 from app.config import settings
 from app.database import SessionLocal
-from app.models import FaceEmbedding, User
-from app.services.cache_service import CacheService
+from app.models import User
+from app.services.embedding_index import EmbeddingSnapshot, embedding_index
+from app.utils.image_processing import calculate_image_quality
 from sqlalchemy.orm import Session
-import hashlib
 
 logger = logging.getLogger(__name__)
 
@@ -21,12 +21,14 @@ logger = logging.getLogger(__name__)
 class FaceRecognitionService:
     """Service for face recognition and comparison."""
     
+    # Identifies the embedding model; part of cache keys for extracted embeddings
+    model_id = "dlib_face_recognition_resnet_model_v1"
+    
     def __init__(self):
         """Initialize face recognition service."""
         self.match_threshold = settings.FACE_MATCH_THRESHOLD
         self.confidence_threshold = settings.FACE_CONFIDENCE_THRESHOLD
-        self.cache_service = CacheService()
-        logger.info(f"Face recognition service initialized (threshold: {self.match_threshold}, cache: {self.cache_service.enabled})")
+        logger.info(f"Face recognition service initialized (threshold: {self.match_threshold})")
     
     def extract_embedding(self, image: np.ndarray, face_location: Optional[Tuple[int, int, int, int]] = None) -> Optional[np.ndarray]:
         """
@@ -57,6 +59,70 @@ class FaceRecognitionService:
             logger.error(f"Error extracting face embedding: {e}")
             return None
     
+    def extract_embedding_with_quality(self, image: np.ndarray,
+                                       face_location: Tuple[int, int, int, int]) -> Tuple[Optional[np.ndarray], float]:
+        """
+        Extract the embedding and quality score of one face from a single crop.
+        
+        The face plus a one-face-size margin (room for the landmark model and
+        the aligned 150x150 chip) is copied once into a small contiguous buffer;
+        embedding and quality both work on that buffer instead of each slicing
+        the full image.
+        
+        Args:
+            image: numpy array representing image (RGB format)
+            face_location: Tuple (top, right, bottom, left) of face location
+            
+        Returns:
+            Tuple of (embedding or None, quality score)
+        """
+        top, right, bottom, left = face_location
+        margin_y, margin_x = bottom - top, right - left
+        height, width = image.shape[:2]
+        y0, x0 = max(top - margin_y, 0), max(left - margin_x, 0)
+        y1, x1 = min(bottom + margin_y, height), min(right + margin_x, width)
+        
+        chip = np.ascontiguousarray(image[y0:y1, x0:x1])
+        chip_location = (top - y0, right - x0, bottom - y0, left - x0)
+        
+        embedding = self.extract_embedding(chip, chip_location)
+        quality = calculate_image_quality(chip, chip_location) if embedding is not None else 0.0
+        return embedding, quality
+    
+    def extract_embeddings_batch(self, items: List[Tuple[np.ndarray, Tuple[int, int, int, int]]]) -> List[Optional[np.ndarray]]:
+        """
+        Extract one embedding per (image, face_location) pair in a single
+        batched dlib call (same landmarks model and jitter as extract_embedding).
+        
+        Args:
+            items: List of (image, face_location) pairs
+            
+        Returns:
+            List of embeddings (None where extraction failed), in input order
+        """
+        if not items:
+            return []
+        
+        try:
+            import dlib
+            from face_recognition import api as face_recognition_api
+            
+            images = [image for image, _ in items]
+            batch_faces = []
+            for image, face_location in items:
+                detections = dlib.full_object_detections()
+                detections.append(face_recognition_api.pose_predictor_5_point(
+                    image, face_recognition_api._css_to_rect(face_location)
+                ))
+                batch_faces.append(detections)
+            
+            descriptors = face_recognition_api.face_encoder.compute_face_descriptor(images, batch_faces, 1)
+            return [np.array(faces[0]) for faces in descriptors]
+            
+        except Exception as e:
+            logger.warning(f"Batched embedding extraction failed, extracting per image: {e}")
+            return [self.extract_embedding(image, face_location) for image, face_location in items]
+    
     def extract_multiple_embeddings(self, image: np.ndarray, face_locations: List[Tuple[int, int, int, int]]) -> List[np.ndarray]:
         """
         Extract embeddings for multiple faces.
@@ -75,6 +141,79 @@ class FaceRecognitionService:
             logger.error(f"Error extracting multiple embeddings: {e}")
             return []
     
+    def _distances_to_confidence(self, distances: np.ndarray) -> np.ndarray:
+        """
+        Map combined distances to confidence scores (sigmoid-like curve).
+        
+        Args:
+            distances: Array of combined distances
+            
+        Returns:
+            Array of confidences in [0, 1]
+        """
+        threshold = self.match_threshold
+        with np.errstate(divide="ignore", invalid="ignore"):
+            confidence = np.select(
+                [distances < 0.3, distances < 0.5, distances < threshold],
+                [
+                    0.95 + (0.05 * (0.3 - distances) / 0.3),
+                    0.80 + (0.15 * (0.5 - distances) / 0.2),
+                    0.70 + (0.10 * (threshold - distances) / (threshold - 0.5)),
+                ],
+                default=np.maximum(0.0, 0.70 - (distances - threshold) / threshold),
+            )
+        return np.clip(confidence, 0.0, 1.0)
+    
+    def compare_faces_matrix(self, snapshot: EmbeddingSnapshot,
+                             unknown_encodings: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Compare several face embeddings against every row of an embedding matrix.
+        
+        Args:
+            snapshot: Known embeddings (matrix and row norms)
+            unknown_encodings: (F, 128) unknown face embeddings
+            
+        Returns:
+            Tuple of (is_match: (F, N) bool array, confidence: (F, N) float array)
+        """
+        unknowns = np.asarray(unknown_encodings, dtype=np.float32).reshape(-1, snapshot.matrix.shape[1])
+        unknown_norms = np.linalg.norm(unknowns, axis=1)[:, None]
+        
+        # One matrix product (SGEMM) feeds both distances for every face: the
+        # gallery is read once per frame and no (N, D) difference array is built
+        dots = unknowns @ snapshot.matrix.T
+        
+        # Euclidean distance (same as face_recognition.face_distance), via
+        # |a - b|^2 = |a|^2 + |b|^2 - 2 a.b
+        squared = snapshot.norms ** 2 + unknown_norms ** 2 - 2.0 * dots
+        euclidean = np.sqrt(np.maximum(squared, 0.0))
+        
+        # Cosine distance, blended in only where both norms are non-zero
+        valid = (snapshot.norms > 0) & (unknown_norms > 0)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            cosine_similarity = dots / (snapshot.norms * unknown_norms)
+        cosine_distance = (1.0 - cosine_similarity) / 2.0
+        combined = np.where(valid, 0.7 * euclidean + 0.3 * cosine_distance, euclidean)
+        
+        is_match = combined <= self.match_threshold
+        return is_match, self._distances_to_confidence(combined)
+    
+    def compare_faces_batch(self, snapshot: EmbeddingSnapshot,
+                            unknown_encoding: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Compare one face embedding against every row of an embedding matrix.
+        Vectorized equivalent of calling compare_faces once per known embedding.
+        
+        Args:
+            snapshot: Known embeddings (matrix and row norms)
+            unknown_encoding: Unknown face embedding (128-dim)
+            
+        Returns:
+            Tuple of (is_match: bool array, confidence: float array), one entry per row
+        """
+        is_match, confidences = self.compare_faces_matrix(snapshot, unknown_encoding)
+        return is_match[0], confidences[0]
+    
     def compare_faces(self, known_encoding: np.ndarray, unknown_encoding: np.ndarray) -> Tuple[bool, float]:
         """
         Compare two face embeddings using a weighted distance + improved confidence.
@@ -104,18 +243,7 @@ class FaceRecognitionService:
                 combined_distance = euclidean_distance
             
             is_match = combined_distance <= self.match_threshold
-            
-            # Improved confidence curve (sigmoid-like)
-            if combined_distance < 0.3:
-                confidence = 0.95 + (0.05 * (0.3 - combined_distance) / 0.3)
-            elif combined_distance < 0.5:
-                confidence = 0.80 + (0.15 * (0.5 - combined_distance) / 0.2)
-            elif combined_distance < self.match_threshold:
-                confidence = 0.70 + (0.10 * (self.match_threshold - combined_distance) / (self.match_threshold - 0.5))
-            else:
-                confidence = max(0.0, 0.70 - (combined_distance - self.match_threshold) / self.match_threshold)
-            
-            confidence = max(0.0, min(1.0, confidence))
+            confidence = float(self._distances_to_confidence(np.asarray([combined_distance]))[0])
             
             if cosine_distance is not None:
                 logger.debug(
@@ -138,7 +266,7 @@ class FaceRecognitionService:
     def find_best_match(self, unknown_encoding: np.ndarray, db: Session) -> Optional[Tuple[User, float]]:
         """
         Find best matching user in database for given face encoding.
-        Uses Redis cache if available for faster lookups.
+        Single-face form of find_best_matches (same matching and thresholds).
         
         Args:
             unknown_encoding: Face embedding to match (128-dim numpy array)
@@ -147,101 +275,73 @@ class FaceRecognitionService:
         Returns:
             Tuple of (User, confidence) if match found, None otherwise
         """
-        try:
-            # Check cache first
-            embedding_hash = self._get_embedding_hash(unknown_encoding)
-            cached_result = self.cache_service.get_recognition_result(embedding_hash)
-            if cached_result:
-                logger.debug("Using cached recognition result")
-                # Reconstruct user from cached data
-                user = db.query(User).filter(User.id == cached_result["user_id"]).first()
-                if user and user.is_active:
-                    return (user, cached_result["confidence"])
+        match = self.find_best_matches([unknown_encoding], db)[0]
+        if match is None:
+            return None
+        
+        user_id, _, confidence = match
+        user = db.get(User, user_id)
+        return (user, confidence) if user is not None else None
+    
+    def find_best_matches(self, unknown_encodings: List[np.ndarray],
+                          db: Session) -> List[Optional[Tuple[int, str, float]]]:
+        """
+        Identify every face of a frame in one pass over the embedding matrix.
+        
+        Uses the shared in-memory embedding index (refreshed on a TTL and on
+        CRUD), so a frame costs one matrix product instead of a database read
+        and a Python comparison loop per face.
+        
+        Args:
+            unknown_encodings: Face embeddings to match (128-dim each)
+            db: Database session
             
-            # Get all face embeddings from database
-            embeddings = db.query(FaceEmbedding).join(User).filter(User.is_active == True).all()
+        Returns:
+            One (user_id, user_name, confidence) per encoding, or None where no
+            user matched above the confidence threshold
+        """
+        if len(unknown_encodings) == 0:
+            return []
+        
+        try:
+            snapshot = embedding_index.get(db)
+            if len(snapshot) == 0:
+                return [None] * len(unknown_encodings)
             
-            if not embeddings:
-                logger.debug("No embeddings in database")
-                return None
+            is_match, confidences = self.compare_faces_matrix(snapshot, np.stack(unknown_encodings))
             
-            best_match = None
-            best_confidence = 0.0
-            best_embedding_id = None
+            # Best matching row per face; the best row also identifies the best user
+            scores = np.where(is_match, confidences, -1.0)
+            best_rows = scores.argmax(axis=1)
+            best_scores = scores[np.arange(len(best_rows)), best_rows]
+            accepted = best_scores >= self.confidence_threshold
+            best_user_ids = snapshot.user_ids[best_rows]
             
-            # Enhanced matching: Try all embeddings for each user and use best one
-            # This improves accuracy by comparing against multiple angles
-            user_confidence_map = {}  # Track best confidence per user
+            # One query for the names of all matched users
+            user_names = {}
+            if accepted.any():
+                user_names = dict(
+                    db.query(User.id, User.name)
+                    .filter(User.id.in_(set(best_user_ids[accepted].tolist())), User.is_active == True)
+                    .all()
+                )
             
-            for embedding in embeddings:
-                # Try cache first
-                cached_emb = self.cache_service.get_face_embedding(embedding.user_id, embedding.id)
-                if cached_emb is not None:
-                    known_encoding = cached_emb
+            results = []
+            for user_id, confidence, ok in zip(best_user_ids.tolist(), best_scores.tolist(), accepted.tolist()):
+                if ok and user_id in user_names:
+                    results.append((user_id, user_names[user_id], confidence))
                 else:
-                    # Convert database array to numpy array
-                    known_encoding = np.array(embedding.embedding)
-                    # Cache it for next time
-                    self.cache_service.cache_face_embedding(
-                        embedding.user_id, 
-                        embedding.id, 
-                        known_encoding
-                    )
-                
-                # Compare faces
-                is_match, confidence = self.compare_faces(known_encoding, unknown_encoding)
-                
-                # For each user, keep track of the best confidence across all their embeddings
-                if is_match:
-                    user_id = embedding.user_id
-                    if user_id not in user_confidence_map:
-                        user_confidence_map[user_id] = {
-                            "user": embedding.user,
-                            "best_confidence": confidence,
-                            "best_embedding_id": embedding.id
-                        }
-                    else:
-                        # Update if this embedding has better confidence
-                        if confidence > user_confidence_map[user_id]["best_confidence"]:
-                            user_confidence_map[user_id]["best_confidence"] = confidence
-                            user_confidence_map[user_id]["best_embedding_id"] = embedding.id
-            
-            # Find the user with the highest confidence
-            for user_id, user_data in user_confidence_map.items():
-                if user_data["best_confidence"] > best_confidence:
-                    best_match = user_data["user"]
-                    best_confidence = user_data["best_confidence"]
-                    best_embedding_id = user_data["best_embedding_id"]
+                    results.append(None)
+            return results
             
-            # Check if best match meets confidence threshold
-            if best_match and best_confidence >= self.confidence_threshold:
-                logger.info(f"Found match: {best_match.name} (confidence: {best_confidence:.2f})")
-                
-                # Cache the result
-                self.cache_service.cache_recognition_result(
-                    embedding_hash,
-                    {
-                        "user_id": best_match.id,
-                        "user_name": best_match.name,
-                        "confidence": best_confidence,
-                        "embedding_id": best_embedding_id
-                    }
-                )
-                
-                return (best_match, best_confidence)
-            else:
-                if best_match:
-                    logger.debug(f"Best match {best_match.name} below confidence threshold ({best_confidence:.2f} < {self.confidence_threshold})")
-                return None
-                
         except Exception as e:
-            logger.error(f"Error finding best match: {e}")
-            return None
+            logger.error(f"Error finding best matches: {e}")
+            return [None] * len(unknown_encodings)
     
     def find_all_matches(self, unknown_encoding: np.ndarray, db: Session, 
                         top_k: int = 5) -> List[Tuple[User, float]]:
         """
-        Find top K matching users in database.
+        Find top K matching users in database (best embedding per user).
         
         Args:
             unknown_encoding: Face embedding to match
@@ -252,24 +352,40 @@ class FaceRecognitionService:
             List of tuples (User, confidence) sorted by confidence (descending)
         """
         try:
-            embeddings = db.query(FaceEmbedding).join(User).filter(User.is_active == True).all()
+            snapshot = embedding_index.get(db)
+            if len(snapshot) == 0:
+                return []
             
-            if not embeddings:
+            # Large galleries: shortlist with the ANN index, then score exactly
+            candidate_rows = snapshot.candidate_rows(unknown_encoding, k=max(top_k * 8, 64))
+            if candidate_rows is not None:
+                snapshot = snapshot.take(candidate_rows)
+            
+            # Compare with all (candidate) embeddings in one vectorized pass
+            is_match, confidences = self.compare_faces_batch(snapshot, unknown_encoding)
+            match_rows = np.flatnonzero(is_match)
+            if match_rows.size == 0:
                 return []
             
-            matches = []
+            # Best confidence per user (a user may have several embeddings)
+            order = match_rows[np.argsort(-confidences[match_rows], kind="stable")]
+            best_user_confidence = {}
+            for row in order:
+                user_id = int(snapshot.user_ids[row])
+                if user_id not in best_user_confidence:
+                    best_user_confidence[user_id] = float(confidences[row])
+                    if len(best_user_confidence) == top_k:
+                        break
             
-            # Compare with all embeddings
-            for embedding in embeddings:
-                known_encoding = np.array(embedding.embedding)
-                is_match, confidence = self.compare_faces(known_encoding, unknown_encoding)
-                
-                if is_match:
-                    matches.append((embedding.user, confidence))
+            users = db.query(User).filter(User.id.in_(list(best_user_confidence))).all()
+            users_by_id = {user.id: user for user in users}
             
-            # Sort by confidence (descending) and return top K
-            matches.sort(key=lambda x: x[1], reverse=True)
-            return matches[:top_k]
+            # Already sorted by confidence (descending)
+            return [
+                (users_by_id[user_id], confidence)
+                for user_id, confidence in best_user_confidence.items()
+                if user_id in users_by_id
+            ]
             
         except Exception as e:
             logger.error(f"Error finding all matches: {e}")
@@ -3,6 +3,7 @@ Face tracking service for maintaining Track IDs across frames.
 Tracks faces as they move through video frames.
 """
 
+from dataclasses import dataclass
 from typing import Dict, Tuple, Optional, List
 import numpy as np
 from datetime import datetime, timedelta
@@ -13,6 +14,60 @@ from app.services.face_recognition import FaceRecognitionService
 logger = logging.getLogger(__name__)
 
 
+def _iou_matrix(boxes_a: np.ndarray, boxes_b: np.ndarray) -> np.ndarray:
+    """
+    Pairwise Intersection over Union of two sets of bounding boxes.
+    
+    Args:
+        boxes_a: (N, 4) array of (top, right, bottom, left)
+        boxes_b: (M, 4) array of (top, right, bottom, left)
+        
+    Returns:
+        (N, M) float32 array of IoU values between 0.0 and 1.0
+    """
+    a = boxes_a[:, None, :]
+    b = boxes_b[None, :, :]
+    
+    # Intersection (clamped at 0 when boxes don't overlap)
+    inter_h = np.clip(np.minimum(a[..., 2], b[..., 2]) - np.maximum(a[..., 0], b[..., 0]), 0, None)
+    inter_w = np.clip(np.minimum(a[..., 1], b[..., 1]) - np.maximum(a[..., 3], b[..., 3]), 0, None)
+    inter_area = inter_h * inter_w
+    
+    # Union
+    area_a = (boxes_a[:, 2] - boxes_a[:, 0]) * (boxes_a[:, 1] - boxes_a[:, 3])
+    area_b = (boxes_b[:, 2] - boxes_b[:, 0]) * (boxes_b[:, 1] - boxes_b[:, 3])
+    union_area = area_a[:, None] + area_b[None, :] - inter_area
+    
+    return np.divide(
+        inter_area, union_area,
+        out=np.zeros_like(inter_area, dtype=np.float32), where=union_area > 0
+    ).astype(np.float32, copy=False)
+
+
+@dataclass
+class RecognizedFaces:
+    """
+    Recognition results for the faces of one frame, as parallel arrays.
+    
+    Attributes:
+        user_ids: (N,) int64 matched User IDs, -1 where the face is unknown
+        user_names: Matched user names, None where the face is unknown
+        confidences: (N,) float32 recognition confidences (0.0 if unknown)
+    """
+    user_ids: np.ndarray
+    user_names: List[Optional[str]]
+    confidences: np.ndarray
+    
+    @classmethod
+    def unknown(cls, count: int) -> "RecognizedFaces":
+        """Preallocate results for count faces, all unknown."""
+        return cls(
+            user_ids=np.full(count, -1, dtype=np.int64),
+            user_names=[None] * count,
+            confidences=np.zeros(count, dtype=np.float32),
+        )
+
+
 class FaceTrack:
     """Represents a tracked face across multiple frames."""
     
@@ -104,122 +159,90 @@ class FaceTrackingService:
         self.face_recognition_service = FaceRecognitionService()
         logger.info("Face tracking service initialized")
     
-    def _calculate_iou(self, bbox1: Tuple[int, int, int, int], bbox2: Tuple[int, int, int, int]) -> float:
-        """
-        Calculate Intersection over Union (IoU) of two bounding boxes.
-        
-        Args:
-            bbox1: (top, right, bottom, left)
-            bbox2: (top, right, bottom, left)
-            
-        Returns:
-            IoU value between 0.0 and 1.0
-        """
-        top1, right1, bottom1, left1 = bbox1
-        top2, right2, bottom2, left2 = bbox2
-        
-        # Calculate intersection
-        inter_top = max(top1, top2)
-        inter_left = max(left1, left2)
-        inter_bottom = min(bottom1, bottom2)
-        inter_right = min(right1, right2)
-        
-        if inter_bottom <= inter_top or inter_right <= inter_left:
-            return 0.0
-        
-        inter_area = (inter_bottom - inter_top) * (inter_right - inter_left)
-        
-        # Calculate union
-        area1 = (bottom1 - top1) * (right1 - left1)
-        area2 = (bottom2 - top2) * (right2 - left2)
-        union_area = area1 + area2 - inter_area
-        
-        if union_area == 0:
-            return 0.0
-        
-        return inter_area / union_area
-    
-    def _calculate_encoding_distance(self, encoding1: np.ndarray, encoding2: np.ndarray) -> float:
-        """Calculate Euclidean distance between two face encodings."""
-        return np.linalg.norm(encoding1 - encoding2)
-    
     def update_tracks(self, face_locations: List[Tuple[int, int, int, int]], 
                      face_encodings: List[np.ndarray],
-                     recognized_users: Optional[List[Tuple[Optional[int], Optional[str], float]]] = None) -> List[FaceTrack]:
+                     recognized: Optional[RecognizedFaces] = None) -> List[FaceTrack]:
         """
         Update tracks with new detections.
         
         Args:
             face_locations: List of face bounding boxes
             face_encodings: List of face embeddings
-            recognized_users: Optional list of (user_id, user_name, confidence) for each face
+            recognized: Optional recognition results, one entry per face
             
         Returns:
-            List of active FaceTrack objects
+            List of active FaceTrack objects, one per face location (same order)
         """
-        if recognized_users is None:
-            recognized_users = [None] * len(face_locations)
+        if recognized is None:
+            recognized = RecognizedFaces.unknown(len(face_locations))
+        
+        # Unbox once per frame instead of per track update
+        user_ids = recognized.user_ids.tolist()
+        confidences = recognized.confidences.tolist()
+        
+        # Tracks that were active before this frame are the match candidates
+        candidates = [track for track in self.tracks.values() if not track.is_lost]
         
         # Mark all existing tracks as potentially lost
         for track in self.tracks.values():
             track.mark_lost()
         
-        # Match new detections to existing tracks
-        matched_tracks = set()
+        # Score every detection against every candidate track at once:
+        # IoU and embedding similarity as (detections x tracks) matrices
+        if candidates and face_locations:
+            iou = _iou_matrix(
+                np.asarray(face_locations, dtype=np.float32).reshape(-1, 4),
+                np.asarray([track.bbox for track in candidates], dtype=np.float32)
+            )
+            encodings = np.asarray(face_encodings, dtype=np.float32)
+            track_encodings = np.asarray([track.face_encoding for track in candidates], dtype=np.float32)
+            encoding_dist = np.linalg.norm(encodings[:, None, :] - track_encodings[None, :, :], axis=2)
+            encoding_similarity = 1.0 / (1.0 + encoding_dist)  # Convert distance to similarity
+            
+            # Combined score (weighted)
+            scores = (iou * 0.6) + (encoding_similarity * 0.4)
+        else:
+            scores = np.zeros((len(face_locations), 0), dtype=np.float32)
+        
+        # Match new detections to existing tracks (kept in detection order)
+        frame_tracks = []
         
         for i, (bbox, encoding) in enumerate(zip(face_locations, face_encodings)):
             best_track = None
-            best_score = 0.0
             
             # Find best matching track
-            for track_id, track in self.tracks.items():
-                if track.is_lost:
-                    continue
-                
-                # Calculate IoU
-                iou = self._calculate_iou(bbox, track.bbox)
-                
-                # Calculate encoding distance
-                encoding_dist = self._calculate_encoding_distance(encoding, track.face_encoding)
-                encoding_similarity = 1.0 / (1.0 + encoding_dist)  # Convert distance to similarity
-                
-                # Combined score (weighted)
-                score = (iou * 0.6) + (encoding_similarity * 0.4)
-                
-                if score > best_score and score > self.iou_threshold:
-                    best_score = score
-                    best_track = track
+            if scores.shape[1]:
+                best = int(np.argmax(scores[i]))
+                if scores[i, best] > self.iou_threshold:
+                    best_track = candidates[best]
+                    # A track follows one face: don't let later detections claim it
+                    scores[:, best] = -np.inf
+            
+            # Recognition result for this face (-1 marks an unknown face)
+            if i < len(user_ids) and user_ids[i] != -1:
+                user_id, user_name, confidence = user_ids[i], recognized.user_names[i], confidences[i]
+            else:
+                user_id, user_name, confidence = None, None, 0.0
             
             # Update or create track
             if best_track:
                 # Update existing track
-                user_info = recognized_users[i] if i < len(recognized_users) else None
-                if user_info:
-                    user_id, user_name, confidence = user_info
-                    best_track.update(bbox, user_id, user_name, confidence)
-                else:
-                    best_track.update(bbox)
-                matched_tracks.add(best_track.track_id)
+                best_track.update(bbox, user_id, user_name, confidence)
+                frame_tracks.append(best_track)
             else:
                 # Create new track
                 track_id = f"{self.next_track_id}"
                 self.next_track_id += 1
                 
-                user_info = recognized_users[i] if i < len(recognized_users) else None
-                if user_info:
-                    user_id, user_name, confidence = user_info
-                else:
-                    user_id, user_name, confidence = None, None, 0.0
-                
                 track = FaceTrack(track_id, encoding, bbox, user_id, user_name, confidence)
                 self.tracks[track_id] = track
-                matched_tracks.add(track_id)
+                frame_tracks.append(track)
         
         # Clean up old tracks
         self._cleanup_tracks()
         
-        # Return active tracks
-        return [track for track in self.tracks.values() if not track.is_lost]
+        # Return active tracks, in the same order as face_locations
+        return frame_tracks
     
     def _cleanup_tracks(self):
         """Remove old or lost tracks."""
@@ -0,0 +1,117 @@
+"""
+Precomputed per-session recognition summaries (PostgreSQL materialized view).
+Keeps /api/logs/sessions from aggregating the whole recognition_logs table
+on every request.
+"""
+
+import asyncio
+import logging
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+SESSIONS_VIEW = "recognition_sessions_mv"
+
+# How often the view is refreshed (seconds); /sessions data is at most this stale
+SESSIONS_VIEW_REFRESH_INTERVAL = 60
+
+# Arbitrary advisory lock key so only one worker refreshes at a time
+_REFRESH_LOCK_KEY = 7_340_021
+
+_CREATE_VIEW_SQL = f"""
+CREATE MATERIALIZED VIEW IF NOT EXISTS {SESSIONS_VIEW} AS
+SELECT session_id,
+       min(created_at) AS start_time,
+       max(created_at) AS end_time,
+       count(*) AS total_recognitions,
+       count(DISTINCT user_id) AS unique_users
+FROM recognition_logs
+WHERE session_id IS NOT NULL
+GROUP BY session_id
+"""
+
+_CREATE_INDEXES_SQL = [
+    # Required by REFRESH ... CONCURRENTLY
+    f"CREATE UNIQUE INDEX IF NOT EXISTS ix_{SESSIONS_VIEW}_session_id ON {SESSIONS_VIEW} (session_id)",
+    f"CREATE INDEX IF NOT EXISTS ix_{SESSIONS_VIEW}_start_time ON {SESSIONS_VIEW} (start_time DESC)",
+]
+
+# Set once the view is known to exist in this process
+_view_available = False
+
+
+def is_sessions_view_available() -> bool:
+    """Whether /sessions can be served from the materialized view."""
+    return _view_available
+
+
+def create_sessions_view(engine: Engine) -> bool:
+    """
+    Create the sessions materialized view and its indexes if missing.
+    
+    Args:
+        engine: Database engine
+    
+    Returns:
+        True if the view is available (PostgreSQL only), False otherwise
+    """
+    global _view_available
+    
+    if engine.dialect.name != "postgresql":
+        logger.info("Sessions materialized view requires PostgreSQL; using live aggregation")
+        return False
+    
+    try:
+        with engine.begin() as conn:
+            conn.execute(text(_CREATE_VIEW_SQL))
+            for statement in _CREATE_INDEXES_SQL:
+                conn.execute(text(statement))
+    except Exception as e:
+        # Another worker may have created it at the same moment
+        logger.warning(f"Could not create {SESSIONS_VIEW}: {e}")
+    
+    try:
+        with engine.connect() as conn:
+            _view_available = conn.execute(
+                text("SELECT to_regclass(:name) IS NOT NULL"), {"name": SESSIONS_VIEW}
+            ).scalar()
+    except Exception as e:
+        logger.warning(f"Could not check for {SESSIONS_VIEW}: {e}")
+        _view_available = False
+    
+    if _view_available:
+        logger.info(f"Serving /api/logs/sessions from {SESSIONS_VIEW}")
+    return _view_available
+
+
+def refresh_sessions_view(engine: Engine) -> bool:
+    """
+    Refresh the view without blocking readers.
+    Skipped if another worker is already refreshing.
+    
+    Returns:
+        True if this call refreshed the view
+    """
+    if not _view_available:
+        return False
+    
+    with engine.begin() as conn:
+        locked = conn.execute(
+            text("SELECT pg_try_advisory_xact_lock(:key)"), {"key": _REFRESH_LOCK_KEY}
+        ).scalar()
+        if not locked:
+            return False
+        conn.execute(text(f"REFRESH MATERIALIZED VIEW CONCURRENTLY {SESSIONS_VIEW}"))
+    return True
+
+
+async def run_sessions_view_refresher(engine: Engine, interval: float = SESSIONS_VIEW_REFRESH_INTERVAL) -> None:
+    """Background task: refresh the view every `interval` seconds until cancelled."""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await asyncio.to_thread(refresh_sessions_view, engine)
+        except Exception as e:
+            logger.warning(f"Error refreshing {SESSIONS_VIEW}: {e}")
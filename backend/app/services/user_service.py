@@ -2,13 +2,13 @@
 User service for database operations related to users and face embeddings.
 """
 
-from typing import Optional, List
-from sqlalchemy.orm import Session
+from typing import Optional, List, Tuple
+from sqlalchemy.orm import Session, selectinload, undefer
 import numpy as np
 import logging
 
 from app.models import User, FaceEmbedding, RecognitionLog
-from app.services.cache_service import CacheService
+from app.services.embedding_index import embedding_index, invalidate_embedding_index
 
 # Optional face recognition import
 try:
@@ -30,7 +30,6 @@ class UserService:
             self.face_recognition_service = FaceRecognitionService()
         else:
             self.face_recognition_service = None
-        self.cache_service = CacheService()
     
     def create_user(self, db: Session, name: str, email: Optional[str] = None,
                    employee_id: Optional[str] = None, extra_data: Optional[str] = None) -> User:
@@ -78,12 +77,9 @@ class UserService:
         Returns:
             Created FaceEmbedding object
         """
-        # Convert numpy array to list for database storage
-        embedding_list = embedding.tolist()
-        
         face_embedding = FaceEmbedding(
             user_id=user_id,
-            embedding=embedding_list,
+            embedding=FaceEmbedding.pack_embedding(embedding),
             capture_angle=capture_angle,
             quality_score=quality_score
         )
@@ -92,15 +88,73 @@ class UserService:
         db.commit()
         db.refresh(face_embedding)
         
-        # Cache the embedding
-        self.cache_service.cache_face_embedding(user_id, face_embedding.id, embedding)
+        invalidate_embedding_index()
         
         logger.info(f"Added face embedding for user ID {user_id}")
         return face_embedding
     
+    def create_user_with_embeddings(self, db: Session, name: str,
+                                    embeddings: List[Tuple[np.ndarray, Optional[str], Optional[float]]],
+                                    email: Optional[str] = None,
+                                    employee_id: Optional[str] = None) -> dict:
+        """
+        Create a user and all of their face embeddings in one transaction.
+        
+        The embedding rows are inserted in a single batched flush and committed
+        together with the user, so a failure leaves neither behind.
+        
+        Args:
+            db: Database session
+            name: User's full name
+            embeddings: List of (embedding, capture_angle, quality_score)
+            email: Email address (optional)
+            employee_id: Employee ID (optional)
+            
+        Returns:
+            Dictionary representation of the created user (User.to_dict()),
+            taken before commit so no reload is needed afterwards
+        """
+        try:
+            face_embeddings = [
+                FaceEmbedding(
+                    embedding=FaceEmbedding.pack_embedding(embedding),
+                    capture_angle=capture_angle,
+                    quality_score=quality_score
+                )
+                for embedding, capture_angle, quality_score in embeddings
+            ]
+            user = User(
+                name=name,
+                email=email,
+                employee_id=employee_id,
+                is_active=True,
+                face_embeddings=face_embeddings
+            )
+            db.add(user)
+            
+            # Insert user and embeddings; server-side timestamps come back with
+            # the INSERT (eager_defaults), and the collection is already in memory
+            db.flush()
+            user_dict = user.to_dict()
+            
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        
+        invalidate_embedding_index()
+        
+        logger.info(f"Created user: {user_dict['name']} (ID: {user_dict['id']}) with {len(face_embeddings)} face embedding(s)")
+        return user_dict
+    
     def get_user(self, db: Session, user_id: int) -> Optional[User]:
-        """Get user by ID."""
-        return db.query(User).filter(User.id == user_id).first()
+        """Get user by ID (face embeddings loaded in the same round trip)."""
+        return (
+            db.query(User)
+            .options(selectinload(User.face_embeddings))
+            .filter(User.id == user_id)
+            .first()
+        )
     
     def get_user_by_email(self, db: Session, email: str) -> Optional[User]:
         """Get user by email."""
@@ -108,7 +162,9 @@ class UserService:
     
     def get_all_users(self, db: Session, active_only: bool = True) -> List[User]:
         """Get all users."""
-        query = db.query(User)
+        # Only the face count is used: compute it in the same SELECT as a
+        # correlated subquery instead of loading every user's embeddings
+        query = db.query(User).options(undefer(User.face_count))
         if active_only:
             query = query.filter(User.is_active == True)
         return query.all()
@@ -131,8 +187,7 @@ class UserService:
         db.delete(user)
         db.commit()
         
-        # Invalidate cache
-        self.cache_service.invalidate_user_embeddings(user_id)
+        invalidate_embedding_index()
         
         logger.info(f"Deleted user: {user.name} (ID: {user_id})")
         return True
@@ -151,16 +206,32 @@ class UserService:
         if not FACE_RECOGNITION_AVAILABLE or not self.face_recognition_service:
             return None  # Cannot check duplicates without face recognition
         
-        match = self.face_recognition_service.find_best_match(embedding, db)
-        if match:
-            user, confidence = match
-            # Use higher threshold for duplicate detection
-            if confidence > 0.9:  # Very high confidence for duplicates
+        snapshot = embedding_index.get(db)
+        if len(snapshot) == 0:
+            return None
+        
+        # Large galleries: only score the ANN shortlist
+        candidate_rows = snapshot.candidate_rows(embedding, k=64)
+        if candidate_rows is not None:
+            snapshot = snapshot.take(candidate_rows)
+        
+        # Score every stored embedding in one vectorized pass, keep the best
+        is_match, confidences = self.face_recognition_service.compare_faces_batch(snapshot, embedding)
+        confidences = np.where(is_match, confidences, 0.0)
+        if confidences.size == 0:
+            return None
+        best_row = int(np.argmax(confidences))
+        
+        # Use higher threshold for duplicate detection
+        if confidences[best_row] > 0.9:  # Very high confidence for duplicates
+            user = db.query(User).filter(User.id == int(snapshot.user_ids[best_row])).first()
+            if user and user.is_active:
                 return user
         return None
     
     def create_recognition_log(self, db: Session, user_id: Optional[int], track_id: Optional[str],
-                              confidence: float, is_unknown: bool, frame_position: Optional[str] = None,
+                              confidence: float, is_unknown: bool,
+                              frame_box: Optional[Tuple[int, int, int, int]] = None,
                               session_id: Optional[str] = None) -> RecognitionLog:
         """
         Create a recognition log entry.
@@ -171,7 +242,7 @@ class UserService:
             track_id: Track ID
             confidence: Confidence score
             is_unknown: Whether person is unknown
-            frame_position: Face position in frame
+            frame_box: Face position in frame as (x, y, width, height)
             session_id: Session identifier
             
         Returns:
@@ -182,7 +253,10 @@ class UserService:
             track_id=track_id,
             confidence=confidence,
             is_unknown=is_unknown,
-            frame_position=frame_position,
+            frame_x=frame_box[0] if frame_box else None,
+            frame_y=frame_box[1] if frame_box else None,
+            frame_width=frame_box[2] if frame_box else None,
+            frame_height=frame_box[3] if frame_box else None,
             session_id=session_id
         )
         
@@ -191,4 +265,23 @@ class UserService:
         db.refresh(log)
         
         return log
-
+    
+    def create_recognition_logs(self, db: Session, rows: List[dict]) -> int:
+        """
+        Insert many recognition log entries with one INSERT and one commit.
+        
+        Args:
+            db: Database session
+            rows: Dicts of RecognitionLog column values
+            
+        Returns:
+            Number of rows inserted
+        """
+        if not rows:
+            return 0
+        
+        # No ids/refresh needed by callers, so skip building ORM objects
+        db.bulk_insert_mappings(RecognitionLog, rows)
+        db.commit()
+        
+        return len(rows)
@@ -0,0 +1,32 @@
+"""
+Helpers for running blocking CPU-bound work (image decoding, face detection,
+embedding extraction) without blocking the asyncio event loop.
+"""
+
+import asyncio
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+# Bounded pool for CPU-heavy work; separate from the AnyIO threadpool that
+# runs sync handlers so long face-processing jobs can't starve DB handlers
+CPU_POOL = ThreadPoolExecutor(
+    max_workers=os.cpu_count() or 4,
+    thread_name_prefix="cpu-worker"
+)
+
+
+async def run_cpu(fn: Callable[..., Any], *args, **kwargs) -> Any:
+    """
+    Run a blocking function in CPU_POOL and await its result.
+    
+    Args:
+        fn: Function to call
+        *args, **kwargs: Arguments passed to fn
+        
+    Returns:
+        Whatever fn returns (exceptions propagate to the caller)
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(CPU_POOL, functools.partial(fn, *args, **kwargs))
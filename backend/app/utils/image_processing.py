@@ -10,6 +10,59 @@ import base64
 from typing import Tuple, Optional, List
 import cv2
 
+# Optional SIMD base64 decoder (falls back to the stdlib)
+try:
+    import pybase64 as fast_base64
+except ImportError:
+    fast_base64 = base64
+
+
+def _pil_decode_rgb(image_data: bytes) -> np.ndarray:
+    """Decode image bytes with PIL (formats OpenCV can't read, e.g. GIF)."""
+    try:
+        image = Image.open(io.BytesIO(image_data))
+    except Exception as e:
+        raise ValueError(f"Failed to open image: {str(e)}")
+    
+    # Convert to RGB if necessary (required for face_recognition)
+    if image.mode == 'RGBA':
+        # Create white background for RGBA images
+        rgb_image = Image.new('RGB', image.size, (255, 255, 255))
+        rgb_image.paste(image, mask=image.split()[3])
+        image = rgb_image
+    elif image.mode != 'RGB':
+        image = image.convert('RGB')
+    
+    return np.array(image)
+
+
+def _cv2_decode_rgb(image_data: bytes) -> Optional[np.ndarray]:
+    """
+    Decode image bytes with OpenCV (libjpeg-turbo/libpng SIMD paths) to RGB uint8.
+    
+    Returns:
+        RGB array, or None if OpenCV can't decode the format
+    """
+    image = cv2.imdecode(np.frombuffer(image_data, np.uint8), cv2.IMREAD_UNCHANGED)
+    if image is None:
+        return None
+    
+    if image.dtype == np.uint16:
+        image = (image >> 8).astype(np.uint8)
+    elif image.dtype != np.uint8:
+        return None
+    
+    if image.ndim == 2:
+        return cv2.cvtColor(image, cv2.COLOR_GRAY2RGB)
+    if image.shape[2] == 3:
+        return cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+    if image.shape[2] == 4:
+        # Composite over a white background (same as the PIL path)
+        alpha = image[:, :, 3:4].astype(np.float32) / 255.0
+        rgb = cv2.cvtColor(image, cv2.COLOR_BGRA2RGB).astype(np.float32)
+        return (rgb * alpha + 255.0 * (1.0 - alpha)).round().astype(np.uint8)
+    return None
+
 
 def decode_base64_image(base64_string: str) -> np.ndarray:
     """
@@ -37,74 +90,14 @@ def decode_base64_image(base64_string: str) -> np.ndarray:
             base64_string = base64_string.split(',')[-1]  # Take last part after comma
         
         # Decode base64
-        image_data = base64.b64decode(base64_string)
+        image_data = fast_base64.b64decode(base64_string)
         
         if not image_data or len(image_data) == 0:
             raise ValueError("Decoded image data is empty")
         
         logger.debug(f"Decoded image data: {len(image_data)} bytes")
         
-        # Convert to PIL Image
-        try:
-            image = Image.open(io.BytesIO(image_data))
-        except Exception as e:
-            raise ValueError(f"Failed to open image: {str(e)}")
-        
-        # Validate image was successfully opened
-        if image is None:
-            raise ValueError("Failed to decode image from base64")
-        
-        # Log original image properties
-        logger.debug(f"Original image: mode={image.mode}, size={image.size}, format={image.format}")
-        
-        # Convert to RGB if necessary (required for face_recognition)
-        if image.mode != 'RGB':
-            logger.debug(f"Converting image from {image.mode} to RGB")
-            # Handle different color modes
-            if image.mode == 'RGBA':
-                # Create white background for RGBA images
-                rgb_image = Image.new('RGB', image.size, (255, 255, 255))
-                rgb_image.paste(image, mask=image.split()[3] if len(image.split()) > 3 else None)
-                image = rgb_image
-            elif image.mode == 'L':  # Grayscale
-                # Convert grayscale to RGB
-                image = image.convert('RGB')
-            elif image.mode == 'P':  # Palette mode
-                # Convert palette to RGB
-                image = image.convert('RGB')
-            else:
-                # Try direct conversion
-                image = image.convert('RGB')
-        
-        # Convert to numpy array
-        image_array = np.array(image)
-        
-        # Validate numpy array
-        if image_array is None or image_array.size == 0:
-            raise ValueError("Failed to convert image to numpy array")
-        
-        # Validate array shape (should be height x width x 3 for RGB)
-        if len(image_array.shape) != 3 or image_array.shape[2] != 3:
-            raise ValueError(f"Invalid image shape: {image_array.shape}, expected (height, width, 3) for RGB")
-        
-        # Validate array dtype (should be uint8)
-        if image_array.dtype != np.uint8:
-            logger.warning(f"Image dtype is {image_array.dtype}, converting to uint8")
-            # Ensure values are in valid range [0, 255]
-            if image_array.max() > 255 or image_array.min() < 0:
-                image_array = np.clip(image_array, 0, 255)
-            image_array = image_array.astype(np.uint8)
-        
-        # Validate pixel values are in valid range
-        if image_array.min() < 0 or image_array.max() > 255:
-            logger.warning(f"Image pixel values out of range: min={image_array.min()}, max={image_array.max()}")
-            image_array = np.clip(image_array, 0, 255).astype(np.uint8)
-        
-        height, width = image_array.shape[:2]
-        logger.debug(f"✅ Successfully decoded image: shape={image_array.shape}, dtype={image_array.dtype}, "
-                    f"range=[{image_array.min()}, {image_array.max()}], mean={image_array.mean():.2f}")
-        
-        return image_array
+        return decode_image_bytes(image_data)
         
     except ValueError:
         raise  # Re-raise ValueError as-is
@@ -113,6 +106,51 @@ def decode_base64_image(base64_string: str) -> np.ndarray:
         raise ValueError(f"Failed to decode base64 image: {str(e)}")
 
 
+def decode_image_bytes(image_data: bytes) -> np.ndarray:
+    """
+    Decode raw image file bytes (JPEG, PNG, ...) to numpy array.
+    
+    Args:
+        image_data: Encoded image bytes (e.g. an uploaded file)
+        
+    Returns:
+        numpy array representing the image (RGB format)
+        
+    Raises:
+        ValueError: If image data is invalid or cannot be decoded
+    """
+    import logging
+    logger = logging.getLogger(__name__)
+    
+    if not image_data:
+        raise ValueError("Image data is empty")
+    
+    try:
+        # Decode with OpenCV first (SIMD JPEG/PNG), PIL for anything else
+        image_array = _cv2_decode_rgb(image_data)
+        if image_array is None:
+            image_array = _pil_decode_rgb(image_data)
+    except Exception as e:
+        raise ValueError(f"Failed to decode image: {str(e)}")
+    
+    # Validate numpy array
+    if image_array is None or image_array.size == 0:
+        raise ValueError("Failed to decode image")
+    
+    # Validate array shape (should be height x width x 3 for RGB)
+    if len(image_array.shape) != 3 or image_array.shape[2] != 3:
+        raise ValueError(f"Invalid image shape: {image_array.shape}, expected (height, width, 3) for RGB")
+    
+    # Validate array dtype (should be uint8)
+    if image_array.dtype != np.uint8:
+        logger.warning(f"Image dtype is {image_array.dtype}, converting to uint8")
+        image_array = np.clip(image_array, 0, 255).astype(np.uint8)
+    
+    logger.debug(f"✅ Successfully decoded image: shape={image_array.shape}, dtype={image_array.dtype}")
+    
+    return image_array
+
+
 def encode_image_to_base64(image_array: np.ndarray) -> str:
     """
     Encode numpy image array to base64 string.
@@ -236,17 +274,22 @@ def calculate_image_quality(image: np.ndarray, face_location: Optional[Tuple[int
     else:
         gray = roi
     
+    # Mean and standard deviation in one native pass each (cv2.meanStdDev)
+    # instead of separate NumPy reductions
+    gray_mean, gray_std = cv2.meanStdDev(gray)
+    _, laplacian_std = cv2.meanStdDev(cv2.Laplacian(gray, cv2.CV_64F))
+    
     # Calculate Laplacian variance (blur detection)
     # Higher variance = sharper image
-    laplacian_var = cv2.Laplacian(gray, cv2.CV_64F).var()
+    laplacian_var = float(laplacian_std[0, 0]) ** 2
     blur_score = min(laplacian_var / 100.0, 1.0)  # Normalize to 0-1
     
     # Calculate brightness (should be around 0.5 for good lighting)
-    brightness = np.mean(gray) / 255.0
+    brightness = float(gray_mean[0, 0]) / 255.0
     brightness_score = 1.0 - abs(brightness - 0.5) * 2  # Penalize too dark or too bright
     
     # Calculate contrast (standard deviation)
-    contrast = np.std(gray) / 255.0
+    contrast = float(gray_std[0, 0]) / 255.0
     contrast_score = min(contrast * 2, 1.0)  # Normalize
     
     # Weighted average
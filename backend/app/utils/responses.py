@@ -0,0 +1,67 @@
+"""
+Response classes and helpers for large JSON payloads.
+"""
+
+import json
+from typing import Any
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+# Optional orjson import (fast native JSON encoding)
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    orjson = None
+    ORJSON_AVAILABLE = False
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSON response encoded with orjson when installed.
+    
+    Meant for endpoints that return already-serializable dicts (e.g. model
+    to_dict() output) directly, skipping per-row pydantic validation and
+    jsonable_encoder. Falls back to the standard encoder without orjson.
+    """
+    
+    def render(self, content: Any) -> bytes:
+        if ORJSON_AVAILABLE:
+            return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+        return super().render(jsonable_encoder(content))
+
+
+def dumps_text(content: Any) -> str:
+    """
+    Encode a message as JSON text (orjson when installed).
+    
+    Used for WebSocket messages, which must stay text frames for the client.
+    NumPy arrays/scalars are serialized natively by orjson.
+    
+    Args:
+        content: JSON-serializable value
+        
+    Returns:
+        JSON string
+    """
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(
+            content, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+        ).decode()
+    return json.dumps(content)
+
+
+def loads_text(text: str) -> Any:
+    """
+    Decode JSON text (orjson when installed).
+    
+    Args:
+        text: JSON string
+        
+    Returns:
+        Decoded value (raises ValueError on invalid JSON)
+    """
+    if ORJSON_AVAILABLE:
+        return orjson.loads(text)
+    return json.loads(text)
@@ -7,11 +7,33 @@ import numpy as np
 import cv2
 import base64
 import io
+import os
+import queue
 import re
-from typing import List, Tuple, Optional, Dict
+import shutil
+import tempfile
+import threading
+from typing import BinaryIO, Callable, List, Tuple, Optional, Dict
 from PIL import Image
 import logging
 
+from app.config import settings
+
+# Optional SIMD base64 decoder (falls back to the stdlib); multi-MB video
+# payloads are where its throughput matters most
+try:
+    import pybase64 as fast_base64
+except ImportError:
+    fast_base64 = base64
+
+# Optional PyAV import (FFmpeg decoding that releases the GIL)
+try:
+    import av
+    PYAV_AVAILABLE = True
+except ImportError:
+    av = None
+    PYAV_AVAILABLE = False
+
 logger = logging.getLogger(__name__)
 
 
@@ -52,7 +74,7 @@ def decode_base64_video(base64_string: str) -> bytes:
             raise ValueError("Invalid base64 video data: only base64 data is allowed")
         
         # Decode base64 with validation
-        video_data = base64.b64decode(base64_string, validate=True)
+        video_data = fast_base64.b64decode(base64_string, validate=True)
         
         if len(video_data) == 0:
             raise ValueError("Decoded video data is empty")
@@ -65,7 +87,7 @@ def decode_base64_video(base64_string: str) -> bytes:
         logger.error(f"Error decoding base64 video: {e}")
         # Try without strict validation as fallback
         try:
-            video_data = base64.b64decode(base64_string, validate=False)
+            video_data = fast_base64.b64decode(base64_string, validate=False)
             if len(video_data) == 0:
                 raise ValueError("Decoded video data is empty")
             return video_data
@@ -107,174 +129,420 @@ def detect_video_format(video_data: bytes) -> str:
     return 'unknown'
 
 
-def extract_frames_from_video(video_data: bytes, max_frames: int = 30, 
-                              frame_interval: int = 5) -> List[np.ndarray]:
+# Base64 characters decoded per step when spooling a video to disk (multiple of 4)
+VIDEO_DECODE_CHUNK_CHARS = 1 << 20
+
+# Bytes copied per step when spooling an uploaded video to disk
+VIDEO_COPY_CHUNK_BYTES = 1 << 20
+
+_NON_BASE64_CHARS = re.compile(r'[^A-Za-z0-9+/=]')
+
+
+def _finalize_video_file(tmp_path: str) -> str:
     """
-    Extract frames from video data.
+    Give a spooled video file the extension matching its container format.
     
     Args:
-        video_data: Video bytes (MP4, WebM, etc.)
-        max_frames: Maximum number of frames to extract
-        frame_interval: Extract every Nth frame (to avoid processing all frames)
+        tmp_path: Path of the spooled video
         
     Returns:
-        List of numpy arrays representing frames (RGB format)
+        Path of the renamed file
     """
-    frames = []
-    tmp_path = None
+    with open(tmp_path, 'rb') as f:
+        header = f.read(12)
     
-    if not video_data or len(video_data) == 0:
-        logger.error("Empty video data provided")
-        return frames
+    video_format = detect_video_format(header)
+    logger.info(f"Detected video format: {video_format}")
     
-    # Validate minimum size (at least 1KB for a valid video)
-    if len(video_data) < 1024:
-        logger.error(f"Video data too small: {len(video_data)} bytes (minimum 1KB required)")
-        return frames
+    # Unknown formats default to WebM (most common for browser recordings)
+    suffix = '.mp4' if video_format == 'mp4' else '.webm'
+    final_path = os.path.splitext(tmp_path)[0] + suffix
+    os.replace(tmp_path, final_path)
+    return final_path
+
+
+def decode_base64_video_to_file(base64_string: str) -> str:
+    """
+    Decode a base64 encoded video into a temporary file, chunk by chunk.
+    
+    Unlike decode_base64_video, the decoded video is never held in memory as
+    a whole; peak extra memory is one chunk. The caller deletes the file.
+    
+    Args:
+        base64_string: Base64 encoded video (with or without data URL prefix)
+        
+    Returns:
+        Path of the temporary video file
+    """
+    if not base64_string:
+        raise ValueError("Empty base64 string provided")
     
-    logger.info(f"Processing video data: {len(video_data)} bytes ({len(video_data) / 1024:.2f} KB)")
+    # Skip data URL prefix if present (e.g., "data:video/webm;base64,...")
+    start = base64_string.rfind(',') + 1
     
+    tmp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.video')
+    tmp_path = tmp_file.name
+    written = 0
     try:
-        import tempfile
-        import os
+        with tmp_file:
+            carry = ''
+            for offset in range(start, len(base64_string), VIDEO_DECODE_CHUNK_CHARS):
+                # Drop whitespace/newlines and keep whole 4-char groups;
+                # leftovers carry over to the next chunk
+                chunk = carry + _NON_BASE64_CHARS.sub('', base64_string[offset:offset + VIDEO_DECODE_CHUNK_CHARS])
+                usable = len(chunk) - len(chunk) % 4
+                carry = chunk[usable:]
+                if usable:
+                    written += tmp_file.write(fast_base64.b64decode(chunk[:usable], validate=True))
+            
+            if carry:
+                # Fix missing padding at the end
+                carry += '=' * (-len(carry) % 4)
+                written += tmp_file.write(fast_base64.b64decode(carry, validate=True))
         
-        # Detect video format
-        video_format = detect_video_format(video_data)
-        logger.info(f"Detected video format: {video_format}")
+        if written == 0:
+            raise ValueError("Decoded video data is empty")
         
-        # Log first few bytes for debugging
-        if len(video_data) >= 12:
-            first_bytes = video_data[:12]
-            logger.debug(f"Video header bytes: {first_bytes.hex()}")
+        logger.info(f"Decoded video to temp file: {written} bytes ({written / 1024:.2f} KB)")
+        return _finalize_video_file(tmp_path)
         
-        # Determine file extension based on detected format
-        if video_format == 'webm':
-            suffix = '.webm'
-        elif video_format == 'mp4':
-            suffix = '.mp4'
-        else:
-            # Try WebM first (most common for browser recordings)
-            logger.warning(f"Unknown video format, defaulting to .webm")
-            suffix = '.webm'
+    except Exception as e:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        if isinstance(e, ValueError) and not isinstance(e, base64.binascii.Error):
+            raise
+        raise ValueError(f"Invalid base64 video data: only base64 data is allowed. Error: {str(e)}")
+
+
+def save_video_to_file(fileobj: BinaryIO) -> str:
+    """
+    Copy an uploaded video stream into a temporary file, chunk by chunk.
+    
+    Args:
+        fileobj: Binary file object (e.g. UploadFile.file)
         
-        # Create temporary file with appropriate extension
-        with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp_file:
-            tmp_file.write(video_data)
-            tmp_path = tmp_file.name
-            tmp_file.flush()
-            os.fsync(tmp_file.fileno())  # Ensure data is written to disk
+    Returns:
+        Path of the temporary video file (the caller deletes it)
+    """
+    with tempfile.NamedTemporaryFile(delete=False, suffix='.video') as tmp_file:
+        shutil.copyfileobj(fileobj, tmp_file, VIDEO_COPY_CHUNK_BYTES)
+        tmp_path = tmp_file.name
+    
+    if os.path.getsize(tmp_path) == 0:
+        os.unlink(tmp_path)
+        raise ValueError("Uploaded video is empty")
+    
+    return _finalize_video_file(tmp_path)
+
+
+FrameSink = Optional[Callable[[np.ndarray], None]]
+
+
+def _extract_frames_pyav(video_path: str, max_frames: int, frame_interval: int,
+                         frame_sink: FrameSink = None) -> List[np.ndarray]:
+    """
+    Extract frames with PyAV, decoding with FFmpeg slice threads.
+    PyAV releases the GIL while decoding, so concurrent uploads decode in parallel.
+    
+    Returns:
+        List of RGB frames (same sampling as the OpenCV path)
+    """
+    frames = []
+    with av.open(video_path) as container:
+        stream = container.streams.video[0]
+        stream.thread_type = "SLICE"
+        stream.thread_count = 0  # Let FFmpeg pick based on CPU count
         
-        try:
-            # Open video with OpenCV
-            logger.info(f"Attempting to open video file: {tmp_path} (format: {video_format})")
-            cap = cv2.VideoCapture(tmp_path)
+        for index, frame in enumerate(container.decode(stream)):
+            if len(frames) >= max_frames:
+                break
+            if index % frame_interval == 0:
+                frames.append(frame.to_ndarray(format="rgb24"))
+                if frame_sink is not None:
+                    frame_sink(frames[-1])
+    
+    return frames
+
+
+def _read_frames_opencv(cap, max_frames: int, frame_interval: int,
+                        frame_sink: FrameSink = None) -> List[np.ndarray]:
+    """Read sampled RGB frames from an opened cv2.VideoCapture."""
+    frames = []
+    
+    # Get video properties for validation
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    frame_count_total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+    height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    
+    logger.info(f"Video properties: {width}x{height}, {fps} FPS, {frame_count_total} total frames")
+    
+    if frame_count_total == 0:
+        logger.warning("Video reports 0 frames, attempting to read anyway")
+    
+    extracted_count = 0
+    current_frame = 0
+    
+    # Read frames sequentially: grab() every frame (no seeking), but only
+    # retrieve() (color-convert/copy out) the sampled ones
+    while extracted_count < max_frames:
+        if not cap.grab():
+            # No more frames or error reading
+            if extracted_count == 0:
+                logger.warning(f"No frames could be read from video (read {current_frame} frames before failure)")
+            break
+        
+        # Extract frame at intervals
+        if current_frame % frame_interval == 0:
+            ret, frame = cap.retrieve()
             
-            if not cap.isOpened():
-                error_msg = f"OpenCV could not open video file: {tmp_path}"
-                logger.error(error_msg)
-                logger.error(f"Video file size: {os.path.getsize(tmp_path) if os.path.exists(tmp_path) else 0} bytes")
-                logger.error(f"Video format detected: {video_format}, extension used: {suffix}")
-                
-                # Check if OpenCV has codec support
-                backend_info = cv2.videoio_registry.getBackends()
-                logger.error(f"Available OpenCV backends: {[str(b) for b in backend_info]}")
-                
-                # Try alternative format if WebM failed
-                if suffix == '.webm':
-                    logger.info("Trying MP4 format as fallback...")
-                    with tempfile.NamedTemporaryFile(delete=False, suffix='.mp4') as tmp_file2:
-                        tmp_file2.write(video_data)
-                        tmp_file2.flush()
-                        os.fsync(tmp_file2.fileno())
-                        tmp_path2 = tmp_file2.name
-                    
-                    cap = cv2.VideoCapture(tmp_path2)
-                    if cap.isOpened():
-                        logger.info("Successfully opened video with MP4 format")
-                        if os.path.exists(tmp_path):
-                            os.unlink(tmp_path)
-                        tmp_path = tmp_path2
-                    else:
-                        logger.error("Could not open video with MP4 format either")
-                        logger.error("Possible causes:")
-                        logger.error("1. Video codec not supported by OpenCV")
-                        logger.error("2. Video file is corrupted")
-                        logger.error("3. OpenCV build doesn't include required codecs")
-                        if os.path.exists(tmp_path2):
-                            os.unlink(tmp_path2)
-                        return frames
+            # Validate frame
+            if ret and frame is not None and frame.size > 0:
+                # Convert BGR to RGB (OpenCV uses BGR)
+                if len(frame.shape) == 3:
+                    frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
                 else:
-                    return frames
-            
-            # Get video properties for validation
-            fps = cap.get(cv2.CAP_PROP_FPS)
-            frame_count_total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-            width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-            height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-            
-            logger.info(f"Video properties: {width}x{height}, {fps} FPS, {frame_count_total} total frames")
-            
-            if frame_count_total == 0:
-                logger.warning("Video reports 0 frames, attempting to read anyway")
-            
-            extracted_count = 0
-            current_frame = 0
-            
-            # Read frames
-            while extracted_count < max_frames:
-                ret, frame = cap.read()
+                    # Grayscale frame, convert to RGB
+                    frame_rgb = cv2.cvtColor(frame, cv2.COLOR_GRAY2RGB)
                 
-                if not ret:
-                    # No more frames or error reading
-                    if extracted_count == 0:
-                        logger.warning(f"No frames could be read from video (read {current_frame} frames before failure)")
-                    break
-                
-                # Extract frame at intervals
-                if current_frame % frame_interval == 0:
-                    # Validate frame
-                    if frame is not None and frame.size > 0:
-                        # Convert BGR to RGB (OpenCV uses BGR)
-                        if len(frame.shape) == 3:
-                            frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                        else:
-                            # Grayscale frame, convert to RGB
-                            frame_rgb = cv2.cvtColor(frame, cv2.COLOR_GRAY2RGB)
-                        
-                        frames.append(frame_rgb)
-                        extracted_count += 1
-                    else:
-                        logger.warning(f"Invalid frame at position {current_frame}")
-                
-                current_frame += 1
+                frames.append(frame_rgb)
+                extracted_count += 1
+                if frame_sink is not None:
+                    frame_sink(frame_rgb)
+            else:
+                logger.warning(f"Invalid frame at position {current_frame}")
+        
+        current_frame += 1
+    
+    return frames
+
+
+def extract_frames_from_video_file(video_path: str, max_frames: int = 30,
+                                   frame_interval: int = 5,
+                                   frame_sink: FrameSink = None) -> List[np.ndarray]:
+    """
+    Extract frames from a video file.
+    
+    Uses PyAV when VIDEO_BACKEND=pyav (and PyAV is installed), OpenCV otherwise.
+    
+    Args:
+        video_path: Path to video file (MP4, WebM, etc.)
+        max_frames: Maximum number of frames to extract
+        frame_interval: Extract every Nth frame (to avoid processing all frames)
+        frame_sink: Optional callback invoked with each frame as soon as it
+            is decoded (lets a consumer start work before decoding finishes)
+        
+    Returns:
+        List of numpy arrays representing frames (RGB format)
+    """
+    frames = []
+    
+    file_size = os.path.getsize(video_path) if os.path.exists(video_path) else 0
+    
+    # Validate minimum size (at least 1KB for a valid video)
+    if file_size < 1024:
+        logger.error(f"Video data too small: {file_size} bytes (minimum 1KB required)")
+        return frames
+    
+    logger.info(f"Processing video file: {file_size} bytes ({file_size / 1024:.2f} KB)")
+    
+    if settings.VIDEO_BACKEND == "pyav":
+        if PYAV_AVAILABLE:
+            try:
+                frames = _extract_frames_pyav(video_path, max_frames, frame_interval, frame_sink)
+                logger.info(f"Successfully extracted {len(frames)} frames from video (PyAV)")
+                return frames
+            except Exception as e:
+                logger.warning(f"PyAV could not decode video, falling back to OpenCV: {e}")
+                frames = []
+        else:
+            logger.warning("VIDEO_BACKEND=pyav but PyAV is not installed, using OpenCV")
+    
+    fallback_path = None
+    try:
+        # Open video with OpenCV
+        logger.info(f"Attempting to open video file: {video_path}")
+        cap = cv2.VideoCapture(video_path)
+        
+        if not cap.isOpened():
+            logger.error(f"OpenCV could not open video file: {video_path} ({file_size} bytes)")
             
-            cap.release()
+            # Check if OpenCV has codec support
+            backend_info = cv2.videoio_registry.getBackends()
+            logger.error(f"Available OpenCV backends: {[str(b) for b in backend_info]}")
+            
+            # Try alternative format if WebM failed
+            if not video_path.endswith('.webm'):
+                return frames
             
-            logger.info(f"Successfully extracted {len(frames)} frames from video")
+            logger.info("Trying MP4 format as fallback...")
+            fallback_path = os.path.splitext(video_path)[0] + '.fallback.mp4'
+            shutil.copyfile(video_path, fallback_path)
             
+            cap = cv2.VideoCapture(fallback_path)
+            if not cap.isOpened():
+                logger.error("Could not open video with MP4 format either")
+                logger.error("Possible causes:")
+                logger.error("1. Video codec not supported by OpenCV")
+                logger.error("2. Video file is corrupted")
+                logger.error("3. OpenCV build doesn't include required codecs")
+                return frames
+            logger.info("Successfully opened video with MP4 format")
+        
+        try:
+            frames = _read_frames_opencv(cap, max_frames, frame_interval, frame_sink)
         finally:
-            # Clean up temporary file
-            if tmp_path and os.path.exists(tmp_path):
-                try:
-                    os.unlink(tmp_path)
-                except Exception as cleanup_error:
-                    logger.warning(f"Error cleaning up temp file {tmp_path}: {cleanup_error}")
+            cap.release()
+        
+        logger.info(f"Successfully extracted {len(frames)} frames from video")
+        
+    except Exception as e:
+        logger.error(f"Error extracting frames from video: {e}", exc_info=True)
+    finally:
+        # Clean up fallback copy
+        if fallback_path and os.path.exists(fallback_path):
+            try:
+                os.unlink(fallback_path)
+            except Exception as cleanup_error:
+                logger.warning(f"Error cleaning up temp file {fallback_path}: {cleanup_error}")
+    
+    return frames
+
+
+def extract_frames_from_video(video_data: bytes, max_frames: int = 30, 
+                              frame_interval: int = 5) -> List[np.ndarray]:
+    """
+    Extract frames from in-memory video data.
+    
+    Prefer decode_base64_video_to_file / save_video_to_file plus
+    extract_frames_from_video_file for large uploads.
     
+    Args:
+        video_data: Video bytes (MP4, WebM, etc.)
+        max_frames: Maximum number of frames to extract
+        frame_interval: Extract every Nth frame (to avoid processing all frames)
+        
+    Returns:
+        List of numpy arrays representing frames (RGB format)
+    """
+    if not video_data or len(video_data) == 0:
+        logger.error("Empty video data provided")
+        return []
+    
+    tmp_path = None
+    try:
+        with tempfile.NamedTemporaryFile(delete=False, suffix='.video') as tmp_file:
+            tmp_file.write(video_data)
+            tmp_path = tmp_file.name
+        tmp_path = _finalize_video_file(tmp_path)
+        
+        return extract_frames_from_video_file(tmp_path, max_frames=max_frames, frame_interval=frame_interval)
+        
     except Exception as e:
         logger.error(f"Error extracting frames from video: {e}", exc_info=True)
+        return []
+    finally:
+        # Clean up temporary file
         if tmp_path and os.path.exists(tmp_path):
             try:
                 os.unlink(tmp_path)
-            except:
-                pass
+            except Exception as cleanup_error:
+                logger.warning(f"Error cleaning up temp file {tmp_path}: {cleanup_error}")
+
+
+def extract_frames_and_detect_faces(
+    video_path: str,
+    detect_batch: Callable[[List[np.ndarray]], List[List[Tuple[int, int, int, int]]]],
+    max_frames: int = 30,
+    frame_interval: int = 5,
+    batch_size: int = 4
+) -> Tuple[List[np.ndarray], List[List[Tuple[int, int, int, int]]]]:
+    """
+    Decode a video and detect faces in its frames as a two-stage pipeline.
     
-    return frames
+    A producer thread decodes frames into a bounded queue while the calling
+    thread runs face detection on batches already decoded. OpenCV/FFmpeg
+    decoding releases the GIL, so wall time approaches max(decode, detect)
+    instead of their sum.
+    
+    Args:
+        video_path: Path to video file (MP4, WebM, etc.)
+        detect_batch: Detector taking a list of frames (e.g.
+            FaceDetectionService.detect_faces_batch)
+        max_frames: Maximum number of frames to extract
+        frame_interval: Extract every Nth frame
+        batch_size: Frames handed to the detector at a time
+        
+    Returns:
+        Tuple of (frames, face_locations_per_frame), same as extracting the
+        frames and then calling detect_batch on all of them
+    """
+    frame_queue: "queue.Queue" = queue.Queue(maxsize=batch_size * 2)
+    done = object()
+    result: Dict[str, List[np.ndarray]] = {}
+    
+    def produce():
+        try:
+            result["frames"] = extract_frames_from_video_file(
+                video_path, max_frames=max_frames, frame_interval=frame_interval,
+                frame_sink=frame_queue.put
+            )
+        finally:
+            frame_queue.put(done)
+    
+    producer = threading.Thread(target=produce, name="video-decode", daemon=True)
+    producer.start()
+    
+    streamed_frames = []
+    face_locations_per_frame = []
+    batch = []
+    finished = False
+    try:
+        while not finished:
+            item = frame_queue.get()
+            if item is done:
+                finished = True
+            else:
+                batch.append(item)
+            # Detect on full batches, or whatever is left at the end
+            if batch and (len(batch) >= batch_size or finished):
+                streamed_frames.extend(batch)
+                face_locations_per_frame.extend(detect_batch(batch))
+                batch = []
+    finally:
+        # If detection failed, keep draining so the producer never blocks on
+        # a full queue, then wait for it to release the video file
+        while not finished:
+            finished = frame_queue.get() is done
+        producer.join()
+    
+    frames = result.get("frames", [])
+    if len(frames) != len(streamed_frames):
+        # The decoder fell back (e.g. PyAV -> OpenCV) and re-streamed frames;
+        # detect on the final frame list instead
+        face_locations_per_frame = detect_batch(frames) if frames else []
+    return frames, face_locations_per_frame
+
+
+# Shared detector, created on first use (avoids re-instantiating per video)
+_face_detection_service = None
+
+
+def _detect_faces_in_frames(frames: List[np.ndarray]) -> List[List[Tuple[int, int, int, int]]]:
+    """Detect faces in all frames (batched where the detector supports it)."""
+    global _face_detection_service
+    if _face_detection_service is None:
+        from app.services.face_detection import FaceDetectionService
+        _face_detection_service = FaceDetectionService()
+    
+    return _face_detection_service.detect_faces_batch(frames)
 
 
 def validate_video_for_face_detection(frames: List[np.ndarray], 
                                      min_frames_with_face: int = 5,
                                      min_face_size: int = 100,
-                                     min_quality_score: float = 0.5) -> Dict:
+                                     min_quality_score: float = 0.5,
+                                     face_locations_per_frame: Optional[List[List[Tuple[int, int, int, int]]]] = None) -> Dict:
     """
     Validate that video contains sufficient good-quality face frames.
     
@@ -283,6 +551,7 @@ def validate_video_for_face_detection(frames: List[np.ndarray],
         min_frames_with_face: Minimum number of frames that must contain a detectable face
         min_face_size: Minimum face size in pixels
         min_quality_score: Minimum quality score for a frame to be considered valid
+        face_locations_per_frame: Precomputed detections per frame (skips detection)
         
     Returns:
         Dictionary with validation results:
@@ -297,10 +566,10 @@ def validate_video_for_face_detection(frames: List[np.ndarray],
             "recommendations": List[str]
         }
     """
-    from app.services.face_detection import FaceDetectionService
     from app.utils.image_processing import check_face_size, calculate_image_quality
     
-    face_detection_service = FaceDetectionService()
+    if face_locations_per_frame is None:
+        face_locations_per_frame = _detect_faces_in_frames(frames)
     
     frames_analyzed = len(frames)
     frames_with_face = 0
@@ -312,11 +581,8 @@ def validate_video_for_face_detection(frames: List[np.ndarray],
     
     valid_frames = []  # Store (index, quality, face_location) for valid frames
     
-    for idx, frame in enumerate(frames):
+    for idx, (frame, face_locations) in enumerate(zip(frames, face_locations_per_frame)):
         try:
-            # Detect faces in frame
-            face_locations = face_detection_service.detect_faces(frame)
-            
             if not face_locations:
                 continue
             
@@ -385,7 +651,8 @@ def validate_video_for_face_detection(frames: List[np.ndarray],
 def get_best_frames_from_video(frames: List[np.ndarray], 
                                num_frames: int = 3,
                                min_face_size: int = 100,
-                               min_quality_score: float = 0.5) -> List[Tuple[np.ndarray, float, Tuple[int, int, int, int]]]:
+                               min_quality_score: float = 0.5,
+                               face_locations_per_frame: Optional[List[List[Tuple[int, int, int, int]]]] = None) -> List[Tuple[np.ndarray, float, Tuple[int, int, int, int]]]:
     """
     Extract the best quality frames from video for registration.
     
@@ -394,23 +661,21 @@ def get_best_frames_from_video(frames: List[np.ndarray],
         num_frames: Number of best frames to return
         min_face_size: Minimum face size
         min_quality_score: Minimum quality score
+        face_locations_per_frame: Precomputed detections per frame (skips detection)
         
     Returns:
         List of tuples: (frame, quality_score, face_location)
         Sorted by quality (best first)
     """
-    from app.services.face_detection import FaceDetectionService
     from app.utils.image_processing import check_face_size, calculate_image_quality
     
-    face_detection_service = FaceDetectionService()
+    if face_locations_per_frame is None:
+        face_locations_per_frame = _detect_faces_in_frames(frames)
     
     valid_frames = []
     
-    for frame in frames:
+    for frame, face_locations in zip(frames, face_locations_per_frame):
         try:
-            # Detect faces
-            face_locations = face_detection_service.detect_faces(frame)
-            
             if not face_locations:
                 continue
             
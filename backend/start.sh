@@ -102,6 +102,21 @@ fi
 echo ""
 
 # Start uvicorn with error handling
+# Run a single worker process: face models are loaded and warmed up once at
+# startup and CPU-bound work runs in the in-process thread pool, so extra
+# workers would only duplicate model memory. On GPU hosts pin the process to
+# one device with CUDA_VISIBLE_DEVICES (e.g. CUDA_VISIBLE_DEVICES=0).
+# --loop/--http auto pick uvloop and httptools (installed with uvicorn[standard]);
+# WebSocket pings keep idle camera connections alive through proxies.
+# Railway terminates connections at its edge proxy: trust its X-Forwarded-For
+# so request.client is the real caller (per-client login rate limiting).
+# Narrow FORWARDED_ALLOW_IPS to the proxy's addresses if the port is reachable
+# from elsewhere.
 echo "Starting uvicorn..."
-exec uvicorn app.main:app --host 0.0.0.0 --port ${PORT:-8000} --loop asyncio --log-level info
+exec uvicorn app.main:app --host 0.0.0.0 --port ${PORT:-8000} \
+    --proxy-headers --forwarded-allow-ips "${FORWARDED_ALLOW_IPS:-*}" \
+    --loop auto --http auto \
+    --ws-ping-interval ${WS_PING_INTERVAL:-20} --ws-ping-timeout ${WS_PING_TIMEOUT:-10} \
+    --ws-max-size 16777216 \
+    --log-level info
 
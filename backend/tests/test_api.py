@@ -126,7 +126,7 @@ def test_get_logs():
         response = requests.get(f"{API_BASE}/logs/", params={"limit": 10})
         print(f"Status: {response.status_code}")
         if response.status_code == 200:
-            logs = response.json()
+            logs = response.json()["items"]
             print(f"Found {len(logs)} log entries")
             for log in logs[:5]:  # Show first 5
                 print(f"  - {log.get('user_name', 'Unknown')} at {log.get('created_at')}")
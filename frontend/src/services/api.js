@@ -136,7 +136,7 @@ export const usersAPI = {
 export const logsAPI = {
   getAll: async (filters = {}) => {
     const response = await api.get('/api/logs/', { params: filters })
-    return response.data
+    return response.data.items
   },
   
   getStats: async () => {